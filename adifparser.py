@@ -9,14 +9,145 @@
 # TODO: write a cabrillo parser
 # TODO: write a log parser manager (higher-level call that picks which type to use; ADIF, cabrillo, etc)
 # TODO: Throw out invalid records (ie, test for invalid call, date/time, etc)
-# TODO: Parser logic fails if a field has a < character in it (KR0ES TDW 2023 W3HF comment field for example)
 
+import os
 import re
 import sys
+import mmap
+import types
+import marshal
 import fileinput
+import functools
 #import magic # using python-magic
 
 
+# ADIF fields that get their own slot on a QSO; scoring reads these all the time
+qso_core_fields = ('call', 'qso_date', 'qso_date_off', 'time_on', 'time_off', 'band', 'freq', 'mode', 'submode',
+                   'dxcc', 'state', 've_prov', 'country', 'qth', 'srx_string', 'srx', 'rst_rcvd', 'comment',
+                   'notes', 'name')
+_qso_core_set = frozenset(qso_core_fields)
+# QSO attributes the dict style access hands out as they are, not as fields
+_qso_attributes = frozenset(['errors', 'member_number'])
+
+# parse_cached() keeps parsed logs here ($CHECKER_ADIF_CACHE, else under
+# $XDG_CACHE_HOME or ~/.cache, never in the checker tree, which the web user
+# may not be able to write); the least recently used go once the directory
+# is over cache_max_bytes
+cache_dir = os.environ.get('CHECKER_ADIF_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'checker', 'adif')
+cache_max_bytes = int(os.environ.get('CHECKER_ADIF_CACHE_SIZE', 256 * 1024 * 1024))
+# bump when the cached record layout changes so old cache files get ignored
+cache_version = 1
+
+
+class QSO:
+    ''' One ADIF record
+        The core fields are str attributes holding the field data (None if
+        the log didn't have the field), eg rec.call, rec.qso_date, rec.band.
+        Anything else lives in the extras dict; value() reads either kind.
+        member_number is filled in by contest code, tokens is contest code's
+        cache of split up exchange fields, errors holds any parser
+        complaints.  rec['call']['data'] / 'call' in rec still work for older
+        code, read-only: each lookup builds a throwaway mapping that can't be
+        written to, so change fields with rec['call'] = ... or the
+        attributes.  rec['errors'] and rec['member_number'] hand back the
+        attributes themselves
+    '''
+    __slots__ = qso_core_fields + ('extras', 'errors', 'member_number', 'tokens')
+
+    def __init__(self):
+        self.call = self.qso_date = self.qso_date_off = self.time_on = self.time_off = None
+        self.band = self.freq = self.mode = self.submode = self.dxcc = self.state = self.ve_prov = None
+        self.country = self.qth = self.srx_string = self.srx = self.rst_rcvd = self.comment = None
+        self.notes = self.name = None
+        self.extras = None
+        self.errors = None
+        self.member_number = None
+        self.tokens = None
+
+    def set(self, name, data):
+        ''' store data for the (lower case) ADIF field name'''
+        if name in _qso_core_set:
+            setattr(self, name, data)
+        elif self.extras is None:
+            self.extras = {name: data}
+        else:
+            self.extras[name] = data
+
+    def value(self, name, default=None):
+        ''' data for the ADIF field name, or default if the record doesn't have it'''
+        if name in _qso_core_set:
+            data = getattr(self, name)
+        elif self.extras is not None:
+            data = self.extras.get(name)
+        else:
+            data = None
+        if data is None:
+            return default
+        return data
+
+    def drop_empty(self):
+        ''' forget fields that came in with no data (eg, <state:0>)'''
+        for name in qso_core_fields:
+            if getattr(self, name) == '':
+                setattr(self, name, None)
+        if self.extras is not None:
+            for name in [name for name in self.extras if self.extras[name] == '']:
+                del self.extras[name]
+
+    def keys(self):
+        ''' names of the ADIF fields this record has'''
+        names = [name for name in qso_core_fields if getattr(self, name) is not None]
+        if self.extras is not None:
+            names.extend(self.extras)
+        return names
+
+    # dict style compatibility: rec['call'] -> {'length': 5, 'data': 'KC3FL'}, read-only
+    def __getitem__(self, name):
+        if name in _qso_attributes:
+            data = getattr(self, name)
+            if data is None:
+                raise KeyError(name)
+            return data
+        data = self.value(name)
+        if data is None:
+            raise KeyError(name)
+        # a copy of the field, so writing to it would be silently lost: don't allow it
+        return types.MappingProxyType({'length': len(data), 'data': data})
+
+    def __setitem__(self, name, field):
+        if name in _qso_attributes:
+            setattr(self, name, field)
+            return
+        if isinstance(field, (dict, types.MappingProxyType)):
+            field = field['data']
+        self.set(name, field)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        if name in _qso_attributes or name in _qso_core_set:
+            setattr(self, name, None)
+        else:
+            del self.extras[name]
+
+    def __contains__(self, name):
+        if name in _qso_attributes:
+            return getattr(self, name) is not None
+        return self.value(name) is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __repr__(self):
+        fields = ', '.join('{}={!r}'.format(name, self.value(name)) for name in self.keys())
+        if self.errors is not None:
+            fields += ', errors={!r}'.format(self.errors)
+        if self.member_number is not None:
+            fields += ', member_number={!r}'.format(self.member_number)
+        return 'QSO({})'.format(fields.lstrip(', '))
+
+
 def parse_header(linebuf):
     # we will stuff our record fields dictionaries in here
     header_elements = []
@@ -99,14 +230,100 @@ def parse_record(linebuf):
     return record_elements,leftover
 
 
-def parse(inputfile):
-    ''' ADIF file parser
-        takes input file and returns a list of dict records
+# ADIF data specifier: <name:length[:type]>, or a bare tag like <eor> / <eoh>
+tag_re = re.compile('<([^<>:]*)(?::([0-9]*)(?::([^<>]*))?)?>')
+# same thing for scanning memory-mapped files as bytes
+tag_bytes_re = re.compile(b'<([^<>:]*)(?::([0-9]*)(?::([^<>]*))?)?>')
+
+
+def scan_header(linebuf):
+    ''' Length-driven counterpart to parse_header()
+        returns the header fields and whatever follows <EOH>, or None and the
+        untouched buffer if <EOH> has not been read yet
     '''
+    fields = {}
+    pos = 0
+    while True:
+        m = tag_re.search(linebuf, pos)
+        if m is None:
+            return None,linebuf
+        name,length,ftype = m.groups()
+        pos = m.end()
+        if length is None:
+            if name.lower() == 'eoh':
+                return fields,linebuf[pos:]
+            continue
+        if not length:
+            continue
+        end = pos + int(length)
+        if end > len(linebuf):
+            return None,linebuf
+        fields[name.lower()] = {'length': int(length), 'data': linebuf[pos:end]}
+        pos = end
 
-    header = None
-    records = []
-    linebuf = ''
+
+def scan_records(linebuf, fields=None):
+    ''' Length-driven ADIF tokenizer
+        walks the buffer once: each <name:len[:type]> tag is read and then
+        exactly len characters of data are sliced off, so field values may
+        contain < or > (KR0ES TDW 2023 W3HF comment field for example).
+        fields is an optional set of lower case field names to keep; other
+        fields are skipped over by length without building anything.
+        Returns a list of QSO records and the unparsed leftover, like
+        parse_record() does with dicts
+    '''
+    record_elements = []
+    record = QSO()
+    empty = True
+    errors = []
+    search = tag_re.search
+    buflen = len(linebuf)
+    start = 0  # beginning of the record we are working on
+    pos = 0
+    while True:
+        m = search(linebuf, pos)
+        if m is None:
+            break
+        name,length,ftype = m.groups()
+        pos = m.end()
+        name = name.lower()
+        if length is None:
+            # bare tag: only <EOR> means anything here
+            if name == 'eor':
+                if errors:
+                    record.errors = errors
+                    empty = False
+                # There's no point appending if the record is empty
+                if not empty:
+                    record_elements.append(record)
+                record = QSO()
+                empty = True
+                errors = []
+                start = pos
+            continue
+        if not length:
+            errors.append(m.group())
+            continue
+        end = pos + int(length)
+        if end > buflen:
+            # the data runs past what we have read so far
+            break
+        if fields is not None and name not in fields:
+            pos = end
+            continue
+        record.set(name, linebuf[pos:end].strip())
+        empty = False
+        pos = end
+    return record_elements,linebuf[start:]
+
+
+def iter_records(inputfile, fields=None, blocksize=65536):
+    ''' Streaming ADIF file parser
+        takes input file and yields one QSO record at a time.  Only the
+        current partial record is buffered, so memory use stays flat no
+        matter how many QSOs are in the log.  If fields is given, only
+        those fields end up in the records
+    '''
 
     #TODO: add field validation (eg, make sure state info is valid - "ON // ONTARIO" ?)
 
@@ -116,24 +333,213 @@ def parse(inputfile):
     #detected = magic.detect_from_filename(inputfile)
     encoding = 'ISO-8859-1'
 
-    with fileinput.input(inputfile, openhook=fileinput.hook_encoded(encoding)) as f:
-        for line in f:
-            if fileinput.isfirstline():
-                if line[0] == '<':
-                    in_header = False
-                else:
-                    in_header = True
-            linebuf = linebuf + line
+    if fields is not None:
+        fields = frozenset(field.lower() for field in fields)
+
+    # only the current partial record is kept between reads
+    linebuf = ''
+    in_header = None
+
+    # newline='' keeps CR/LF pairs intact so the ADIF lengths line up with the data
+    with open(inputfile, encoding=encoding, newline='') as f:
+        for chunk in iter(functools.partial(f.read, blocksize), ''):
+            linebuf = linebuf + chunk
+            if in_header is None:
+                # anything other than a tag up front means there is a header
+                in_header = linebuf[0] != '<'
             if in_header:
-                if '<eoh>' in line.lower():
-                    header,linebuf = parse_header(linebuf)
-                    in_header = False
-            else:
-                if '<eor>' in line.lower():
-                    record,linebuf = parse_record(linebuf)
-                    for rec in record:
-                        records.append(rec)
+                header,linebuf = scan_header(linebuf)
+                if header is None:
+                    continue
+                in_header = False
+            records,linebuf = scan_records(linebuf, fields)
+            yield from records
 
+
+def iter_records_mmap(inputfile, fields=None):
+    ''' Memory-mapped ADIF file parser
+        maps the whole file and scans the tags as bytes, so nothing is copied
+        or decoded up front.  Only the values of the requested fields are
+        decoded (fields=None keeps everything); the rest are skipped by length
+    '''
+    encoding = 'ISO-8859-1'
+    if fields is not None:
+        wanted = set(field.lower().encode('ascii') for field in fields)
+    else:
+        wanted = None
+
+    with open(inputfile, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped (and have no records anyway)
+            return
+        with mm:
+            search = tag_bytes_re.search
+            size = len(mm)
+            in_header = mm[:1] != b'<'
+            record = QSO()
+            empty = True
+            errors = []
+            pos = 0
+            while True:
+                m = search(mm, pos)
+                if m is None:
+                    break
+                name,length,ftype = m.groups()
+                pos = m.end()
+                name = name.lower()
+                if length is None:
+                    if in_header:
+                        if name == b'eoh':
+                            in_header = False
+                    elif name == b'eor':
+                        if errors:
+                            record.errors = errors
+                            empty = False
+                        if not empty:
+                            yield record
+                        record = QSO()
+                        empty = True
+                        errors = []
+                    continue
+                if not length:
+                    if not in_header:
+                        errors.append(m.group().decode(encoding))
+                    continue
+                end = pos + int(length)
+                if end > size:
+                    # truncated file; drop the partial record like parse() does
+                    break
+                if in_header or (wanted is not None and name not in wanted):
+                    pos = end
+                    continue
+                record.set(name.decode(encoding), mm[pos:end].decode(encoding).strip())
+                empty = False
+                pos = end
+
+
+def parse_mmap(inputfile, fields=None):
+    ''' Memory-mapped ADIF file parser
+        takes input file and returns a list of QSO records, decoding only
+        the requested fields
+    '''
+    return list(iter_records_mmap(inputfile, fields))
+
+
+def parse(inputfile, fields=None):
+    ''' ADIF file parser
+        takes input file and returns a list of QSO records, optionally
+        limited to the given fields
+    '''
+    return list(iter_records(inputfile, fields))
+
+
+def dump_records(records):
+    ''' QSO records as plain tuples marshal can write: the core fields, then extras and errors'''
+    return [tuple([getattr(rec, name) for name in qso_core_fields]) + (rec.extras, rec.errors) for rec in records]
+
+
+def load_records(rows):
+    ''' dump_records() rows back into QSO records'''
+    records = []
+    names = qso_core_fields + ('extras', 'errors')
+    for row in rows:
+        record = QSO()
+        for name, data in zip(names, row):
+            if data is not None:
+                setattr(record, name, data)
+        records.append(record)
+    return records
+
+
+def file_digest(inputfile):
+    import hashlib  # only the cache needs it; keep it out of every contest script's startup
+    digest = hashlib.sha1()
+    with open(inputfile, 'rb') as f:
+        for block in iter(functools.partial(f.read, 1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_file(inputfile, fields, parser, directory):
+    ''' where parse_cached() keeps inputfile parsed by parser with fields'''
+    import hashlib
+    if fields is not None:
+        fields = sorted(set(field.lower() for field in fields))
+    key = repr((os.path.abspath(inputfile), fields, parser.__name__))
+    return os.path.join(directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.records')
+
+
+def trim_cache(directory=None, limit=None):
+    ''' remove the least recently used cached logs until directory fits in limit bytes'''
+    directory = directory or cache_dir
+    limit = cache_max_bytes if limit is None else limit
+    entries = []
+    total = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.records'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total += stat.st_size
+    for mtime, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def parse_cached(inputfile, fields=None, parser=parse, directory=None):
+    ''' parse() (or parse_mmap(), passed as parser) with a disk cache
+        a log whose path, size, mtime and contents match the cached copy
+        comes back from the cache without being tokenized again.  Records
+        come back fresh from the cache file each time, so callers are free
+        to change them
+    '''
+    directory = directory or cache_dir
+    stat = os.stat(inputfile)
+    path = cache_file(inputfile, fields, parser, directory)
+    # the log is read for its digest at most once, hit or miss
+    digest = None
+    try:
+        with open(path, 'rb') as f:
+            cached = marshal.loads(f.read())
+        if (cached['version'] == cache_version and cached['python'] == tuple(sys.version_info[:2]) and
+                cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns):
+            digest = file_digest(inputfile)
+            if cached['digest'] == digest:
+                # mtime is the LRU clock
+                os.utime(path)
+                return load_records(cached['records'])
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+
+    if digest is None:
+        digest = file_digest(inputfile)
+    records = parser(inputfile, fields)
+    cached = {
+        'version': cache_version,
+        'python': tuple(sys.version_info[:2]),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'digest': digest,
+        'records': dump_records(records),
+    }
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # write then rename so a reader never sees half a cache file
+        tmpname = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmpname, 'wb') as f:
+            f.write(marshal.dumps(cached))
+        os.replace(tmpname, path)
+        trim_cache(directory)
+    except OSError:
+        # no cache is only slower; the caller's output shouldn't change
+        pass
     return records
 
 
@@ -146,13 +552,24 @@ if __name__ == '__main__':
     parser.add_argument('-o', '--format', dest='format', default='csv', help='Output format: csv(default), txt')
     parser.add_argument('-f', '--fields', dest='fields', nargs='*', help='List of output fields',
                                             default=['call','qso_date','time_on','band','mode'])
+    parser.add_argument('-m', '--mmap', dest='mmap', help='Memory-map the file instead of streaming it',
+                                            action='store_true')
     parser.add_argument('-d', '--debug', dest='debug', help='Debug flag', action='store_true')
     parser.set_defaults(debug=False)
+    parser.set_defaults(mmap=False)
     args = parser.parse_args()
     if args.debug:
         print(args)
 
-    records = parse(args.inputfile)
+    # the debug dump below wants every field
+    if args.debug:
+        fields = None
+    else:
+        fields = args.fields
+    if args.mmap:
+        records = parse_mmap(args.inputfile, fields)
+    else:
+        records = parse(args.inputfile, fields)
     headers = args.fields
 
     if args.format == 'text':
@@ -164,14 +581,11 @@ if __name__ == '__main__':
     for rec in records:
         output_record = []
         for header in headers:
-            try:
-                output_record.append(rec[header]['data'])
-            except KeyError:
-                output_record.append('data not found')
+            output_record.append(rec.value(header.lower(), 'data not found'))
         output_writer.writerow(output_record)
 
     if args.debug:
         for rec in records:
             print("\n--- NEW RECORD ---")
-            for key in sorted(rec):
-                print("<{}:{}>{} ".format(key, rec[key]['length'], rec[key]['data']))
+            for key in sorted(rec.keys()):
+                print("<{}:{}>{} ".format(key, len(rec.value(key)), rec.value(key)))
@@ -0,0 +1,493 @@
+#!/usr/local/bin/python3
+#
+# benchmark.py
+#
+# timing harness for the parser and scoring hot paths
+# run with --help for the list of suites
+
+import os
+import re
+import sys
+import time
+import copy
+import random
+import datetime
+import argparse
+import collections
+import subprocess
+import tempfile
+import tracemalloc
+import adifparser
+import contests
+import endorsements
+import crosscheck
+
+
+def best_of(func, repeat):
+    """ run func repeat times and return (best wall time in seconds, last result)"""
+    best = None
+    result = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def synthetic_log(records, seed=0):
+    """ Build an ADIF string with a header and N records that looks roughly
+        like a typical logger export (extra logger fields, free text comments
+        that sometimes carry < and > characters)
+    """
+    rng = random.Random(seed)
+    calls = ['KA3X', 'AG4CZ', 'W9SMR/9', 'DU1/N6HPX', 'JA1ABC', 'VE3XYZ', 'KH6AB', 'EI2AB', 'N0NM', 'G4BRA']
+    bands = ['160m', '80m', '40m', '20m', '15m', '10m']
+    comments = ['tnx fer QSO', 'FB signal <599>', 'name Bob qth PA', 'op in <KR0ES> shack', 'rig 5w > dipole',
+                'sked <14:070> tnx']
+    extra = ''.join('<app_logger_field{}:4>xxxx '.format(i) for i in range(20))
+
+    def field(name, value):
+        return '<{}:{}>{} '.format(name, len(value), value)
+
+    out = ['synthetic benchmark log\n', field('adif_ver', '3.1.0'), field('programid', 'BENCH'), '<EOH>\n']
+    for i in range(records):
+        out.append(field('call', rng.choice(calls)))
+        out.append(field('qso_date', '2024{:02}{:02}'.format(rng.randint(1, 12), rng.randint(1, 28))))
+        out.append(field('time_on', '{:02}{:02}{:02}'.format(rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59))))
+        out.append(field('band', rng.choice(bands)))
+        out.append(field('mode', 'PSK31'))
+        out.append(field('rst_sent', '599'))
+        out.append(field('rst_rcvd', '599'))
+        out.append(field('comment', rng.choice(comments)))
+        out.append(extra)
+        out.append('<EOR>\n')
+    return ''.join(out)
+
+
+def bench_tokenizer(args):
+    """ regex parse_record() vs the length-driven scan_records() on one buffer"""
+    linebuf = synthetic_log(args.records)
+    header, body = adifparser.scan_header(linebuf)
+    print('tokenizer: {} records, {:.1f} MB'.format(args.records, len(body) / 1e6))
+
+    regex_time, (regex_records, leftover) = best_of(lambda: adifparser.parse_record(body), args.repeat)
+    scan_time, (scan_records, leftover) = best_of(lambda: adifparser.scan_records(body), args.repeat)
+
+    mismatched = 0
+    for old, new in zip(regex_records, scan_records):
+        if old.get('comment', {}).get('data') != new.comment:
+            mismatched += 1
+    print('  regex parse_record : {:8.3f}s  {:>10.0f} rec/s'.format(regex_time, len(regex_records) / regex_time))
+    print('  scan_records       : {:8.3f}s  {:>10.0f} rec/s'.format(scan_time, len(scan_records) / scan_time))
+    print('  speedup            : {:8.2f}x'.format(regex_time / scan_time))
+    print('  comments the regex path got wrong: {}'.format(mismatched))
+
+
+def peak_memory(func):
+    """ run func under tracemalloc and return the peak traced allocation in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_mmap(args):
+    """ parse() vs parse_mmap() with the endorsement field set on a file on disk"""
+    with tempfile.NamedTemporaryFile('w', suffix='.adi', encoding='ISO-8859-1', delete=False) as f:
+        f.write(synthetic_log(args.records))
+    try:
+        print('mmap: {} records, {:.1f} MB on disk'.format(args.records, os.path.getsize(f.name) / 1e6))
+        fields = endorsements.endorsement_fields
+        parse_time, records = best_of(lambda: adifparser.parse(f.name), args.repeat)
+        mmap_time, records = best_of(lambda: adifparser.parse_mmap(f.name, fields), args.repeat)
+        parse_peak = peak_memory(lambda: adifparser.parse(f.name))
+        mmap_peak = peak_memory(lambda: adifparser.parse_mmap(f.name, fields))
+    finally:
+        os.unlink(f.name)
+    print('  parse              : {:8.3f}s  peak {:8.1f} MB'.format(parse_time, parse_peak / 1e6))
+    print('  parse_mmap(fields) : {:8.3f}s  peak {:8.1f} MB'.format(mmap_time, mmap_peak / 1e6))
+
+
+def bench_adif_cache(args):
+    """ parse_mmap() vs parse_cached() on a cold and a warm cache (what endorsements.py does)"""
+    with tempfile.NamedTemporaryFile('w', suffix='.adi', encoding='ISO-8859-1', delete=False) as f:
+        f.write(synthetic_log(args.records))
+    cachedir = tempfile.mkdtemp()
+    try:
+        print('adifcache: {} records, {:.1f} MB on disk'.format(args.records, os.path.getsize(f.name) / 1e6))
+        fields = endorsements.endorsement_fields
+        parse_time, records = best_of(lambda: adifparser.parse_mmap(f.name, fields), args.repeat)
+        cold_time, cold = best_of(lambda: adifparser.parse_cached(f.name, fields, adifparser.parse_mmap, cachedir), 1)
+        warm_time, warm = best_of(lambda: adifparser.parse_cached(f.name, fields, adifparser.parse_mmap, cachedir),
+                                  args.repeat)
+    finally:
+        os.unlink(f.name)
+        adifparser.trim_cache(cachedir, 0)
+        os.rmdir(cachedir)
+    print('  parse_mmap         : {:8.3f}s'.format(parse_time))
+    print('  parse_cached cold  : {:8.3f}s'.format(cold_time))
+    print('  parse_cached warm  : {:8.3f}s'.format(warm_time))
+    print('  records that differ: {}'.format(sum(1 for old, new in zip(records, warm) if repr(old) != repr(new))))
+
+
+def bench_dupes(args):
+    """ dupe check of every QSO, scanning the valid list vs a kept dupe index"""
+    linebuf = synthetic_log(args.records)
+    header, body = adifparser.scan_header(linebuf)
+    records, leftover = adifparser.scan_records(body)
+    # the synthetic log only has a handful of calls; spread them out so only some QSOs are dupes
+    for i, rec in enumerate(records):
+        rec.call = '{}{}'.format(rec.call, i % 1000)
+    print('dupes: {} records'.format(len(records)))
+
+    def check(indexed):
+        valid = []
+        dupe_index = set() if indexed else None
+        dupes = 0
+        for rec in records:
+            if contests.rec_is_not_dupe(rec, valid, dupe_index):
+                valid.append(rec)
+                if indexed:
+                    dupe_index.add(contests.dupe_key(rec))
+            else:
+                dupes += 1
+        return dupes
+
+    plain_time, plain_dupes = best_of(lambda: check(False), 1)
+    index_time, index_dupes = best_of(lambda: check(True), args.repeat)
+    print('  no index           : {:8.3f}s  {} dupes'.format(plain_time, plain_dupes))
+    print('  dupe index         : {:8.3f}s  {} dupes'.format(index_time, index_dupes))
+
+
+def import_times(statement):
+    """ run statement in a fresh interpreter with -X importtime, return {module: cumulative us}"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=os.path.dirname(__file__) or '.',
+                          stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumulative_us)
+    return times
+
+
+def bench_startup(args):
+    """ import cost of contests (what every contest script and web upload pays) and of the member list"""
+    print('startup: fresh interpreter, best of {}'.format(args.repeat))
+    for statement in ['import contests', 'import contests; contests.members.is_member("KA3X")']:
+        wall, times = best_of(lambda: import_times(statement), args.repeat)
+        print('  {:52}: {:6.3f}s wall, contests import {:5.1f} ms'.format(
+            statement, wall, times.get('contests', 0) / 1000))
+    load_time, result = best_of(contests.members.load_members, 1)
+    print('  {:52}: {:6.3f}s'.format('member list load (first lookup)', load_time))
+
+
+def walk_state_token(element, names=False):
+    """ the old get_state() test of one (upper cased) token: the state tables' keys, then a walk of their names"""
+    if element in contests.dxcc_291_states.keys():
+        return element
+    if element in contests.dxcc_1_states.keys():
+        return element
+    if element in ['AK', 'HI']:
+        return element
+    if names:
+        for key in contests.dxcc_291_states.keys():
+            if element == contests.dxcc_291_states[key]['name'].upper():
+                return key.upper()
+        for key in contests.dxcc_1_states.keys():
+            if element == contests.dxcc_1_states[key]['name'].upper():
+                return key.upper()
+    if element in contests.arrl_section_to_state:
+        return contests.arrl_section_to_state[element]['state']
+    return None
+
+
+def walk_get_state(rec):
+    """ the old get_state(): every field split again on every call, every token walked through the tables"""
+    if rec.state is not None:
+        for element in re.split(r'[\W\s]{1}', rec.state):
+            state = walk_state_token(element.upper(), names=True)
+            if state is not None:
+                return state
+    if rec.ve_prov is not None:
+        return rec.ve_prov
+    for field in contests.state_search_fields:
+        data = rec.value(field)
+        if data is not None:
+            for element in re.split(r'[\W\s]{1}', data):
+                state = walk_state_token(element.upper())
+                if state is not None:
+                    return state
+    if rec.qth is not None:
+        qth_data = rec.qth.upper()
+        if len(qth_data) == 2:
+            state = walk_state_token(qth_data)
+            if state is not None:
+                return state
+        elif len(qth_data) > 2:
+            for element in re.split(r'[,\s]{1}', qth_data):
+                state = walk_state_token(element)
+                if state is not None:
+                    return state
+    for section_field in ['arrl_sect', 'section']:
+        section = rec.value(section_field)
+        if section is not None and section in contests.arrl_section_to_state:
+            return contests.arrl_section_to_state[section]['state']
+    return None
+
+
+def walk_get_dxcc_qth(qth):
+    """ the old get_dxcc() QTH lookup: every entity name against every QTH word"""
+    if qth.upper() in ['US', 'USA', 'UNITED STATES']:
+        return '291'
+    for entity in contests.dxcc_entities:
+        for qth_item in qth.upper().split():
+            if qth_item == contests.dxcc_entities[entity]['name']:
+                return entity.upper()
+    return None
+
+
+def bench_qth(args):
+    """ get_state() + get_dxcc() on QSOs whose only location is a free text QTH"""
+    rng = random.Random(0)
+    qths = ['Springfield IL', 'Tokyo JAPAN', 'near Sydney AUSTRALIA', 'Ottawa ON Canada', 'somewhere in the woods',
+            'Zagreb CROATIA', 'Honolulu HI', 'Lisbon PORTUGAL', 'home QTH', 'Manila PHILIPPINES']
+    records = []
+    for i in range(args.records // 10):
+        rec = adifparser.QSO()
+        rec.call = 'N0CALL'
+        rec.qth = rng.choice(qths)
+        records.append(rec)
+    print('qth: {} records with only a QTH'.format(len(records)))
+
+    def walk():
+        # a QTH with no country in it falls back to the call, as get_dxcc() does
+        return [(walk_get_state(rec), walk_get_dxcc_qth(rec.qth) or contests.call_dxcc(rec.call))
+                for rec in records]
+
+    def indexed():
+        return [(contests.get_state(rec), contests.get_dxcc(rec)) for rec in records]
+
+    walk_time, walk_found = best_of(walk, args.repeat)
+    index_time, index_found = best_of(indexed, args.repeat)
+    print('  table walk         : {:8.2f} us/record'.format(walk_time / len(records) * 1e6))
+    print('  name indexes       : {:8.2f} us/record'.format(index_time / len(records) * 1e6))
+    print('  results differ     : {}'.format(sum(1 for old, new in zip(walk_found, index_found) if old != new)))
+
+
+def bench_cty(args):
+    """ call_dxcc() on call signs only, first lookup (trie walk) and repeat lookups (LRU memo)"""
+    rng = random.Random(0)
+    prefixes = ['W', 'K', 'N', 'VE', 'JA', 'DL', 'G', 'GM', 'UA', 'KH', 'EA', 'VK', 'PY', 'ZS', '9A', 'DU1/N']
+    calls = ['{}{}{}'.format(rng.choice(prefixes), rng.randint(0, 9),
+                             ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for i in range(3)))
+             for i in range(args.records // 10)]
+    load_time, tables = best_of(contests.read_cty, args.repeat)
+    contests.get_cty()
+    print('cty: {} calls, {} distinct'.format(len(calls), len(set(calls))))
+
+    def resolve():
+        contests.call_dxcc.cache_clear()
+        return [contests.call_dxcc(call) for call in calls]
+
+    cold_time, found = best_of(resolve, args.repeat)
+    warm_time, found = best_of(lambda: [contests.call_dxcc(call) for call in calls], args.repeat)
+    print('  read_cty           : {:8.3f}s  {} exact calls'.format(load_time, len(tables[1])))
+    print('  trie walk          : {:8.2f} us/call'.format(cold_time / len(calls) * 1e6))
+    print('  memoized           : {:8.2f} us/call'.format(warm_time / len(calls) * 1e6))
+    print('  unresolved         : {}'.format(found.count(None)))
+
+
+def list_mults(valid_records):
+    """ the old calc_scores() multiplier count: list membership tests, int() per QSO"""
+    dxcc = []
+    state = []
+    for rec in valid_records:
+        if rec.dxcc is not None and rec.dxcc not in dxcc:
+            dxcc.append(rec.dxcc)
+        try:
+            if rec.state.upper() not in state and int(rec.dxcc) in [1, 6, 110, 291]:
+                state.append(rec.state.upper())
+        except:
+            pass
+    return dxcc, state
+
+
+def bench_mults(args):
+    """ DXCC/state multiplier counting on a big field of distinct multipliers, lists vs MultiplierTally"""
+    rng = random.Random(0)
+    records = []
+    for i in range(args.records // 4):
+        rec = adifparser.QSO()
+        rec.dxcc = str(rng.randint(1, 3000))
+        rec.state = 'S{}'.format(rng.randint(1, 3000)) if rng.random() < 0.5 else None
+        records.append(rec)
+    print('mults: {} records'.format(len(records)))
+
+    def tally():
+        dxcc, state = contests.MultiplierTally(), contests.MultiplierTally()
+        for rec in records:
+            contests.count_dxcc_state(rec, dxcc, state)
+        return dxcc.data, state.data
+
+    list_time, list_found = best_of(lambda: list_mults(records), 1)
+    tally_time, tally_found = best_of(tally, args.repeat)
+    print('  lists              : {:8.3f}s  {} dxcc {} state'.format(list_time, *map(len, list_found)))
+    print('  MultiplierTally    : {:8.3f}s  {} dxcc {} state'.format(tally_time, *map(len, tally_found)))
+    print('  results differ     : {}'.format(list_found != tally_found))
+
+
+def columnar_log(conditions, records, rng):
+    """ QSOs around a contest: some outside it, odd bands and modes, a few missing calls, plenty of dupes"""
+    start = conditions['contest_start']
+    log = []
+    for i in range(records):
+        rec = adifparser.QSO()
+        if rng.random() > 0.01:
+            rec.call = rng.choice(['KA3X', 'AG4CZ', 'W9SMR', 'W9SMR/9', 'DU1/N6HPX', 'JA1ABC', 'VE3XYZ', 'N0NM']) + \
+                       str(rng.randint(0, records // 10))
+        when = start + datetime.timedelta(minutes=rng.randint(-600, 3600))
+        rec.qso_date = when.strftime('%Y%m%d')
+        rec.time_on = when.strftime('%H%M%S' if rng.random() < 0.5 else '%H%M')
+        rec.band = rng.choice(['80m', '40m', '20m', '20M', '15m', '160m', None])
+        rec.mode = rng.choice(['PSK31', 'PSK31', 'BPSK31', 'CW', None])
+        rec.dxcc = rng.choice(['291', '1', '110', '339', None])
+        rec.state = rng.choice(['PA', 'ca', 'ON', None])
+        log.append(rec)
+    return log
+
+
+def backend_results(contest, log, conditions, summary):
+    """ run_contest() with each backend on its own copy of log (enrichers change the records they're given)"""
+    return [contests.run_contest(contests.contest_specs[contest], {'log': copy.deepcopy(log)}, dict(conditions),
+                                 summary, backend) for backend in ['python', 'numpy']]
+
+
+def bench_columnar(args):
+    """ run_contest() checks one QSO at a time vs as NumPy columns, and a parity check of the two"""
+    import columnar
+    if not columnar.available():
+        print('columnar: NumPy not installed, skipped')
+        return
+    rng = random.Random(0)
+    mismatches = 0
+    runs = 0
+    for contest in ['pskfest', 'firecracker']:
+        conditions = contests.set_conditions(2024, contest)
+        for seed in range(200):
+            summary = {'contest_name': contest, 'block_start_time': rng.choice(['0000', '0600', '2000', '0100'])}
+            log = columnar_log(conditions, rng.randint(0, 300), rng)
+            python, numpy = backend_results(contest, log, conditions, summary)
+            runs += 1
+            if repr(python) != repr(numpy):
+                mismatches += 1
+    print('columnar: {} random logs, {} mismatches'.format(runs, mismatches))
+
+    conditions = contests.set_conditions(2024, 'pskfest')
+    summary = {'contest_name': 'pskfest', 'block_start_time': '0000'}
+    log = columnar_log(conditions, args.records, random.Random(1))
+    print('columnar: {} records'.format(len(log)))
+    for backend in ['python', 'numpy']:
+        best = None
+        for i in range(args.repeat):
+            adif_files = {'log': copy.deepcopy(log)}
+            elapsed, result = best_of(lambda: contests.run_contest(contests.contest_specs['pskfest'], adif_files,
+                                                                   dict(conditions), summary, backend), 1)
+            best = elapsed if best is None else min(best, elapsed)
+        print('  {:19}: {:8.3f}s  {} valid {} invalid'.format(backend, best, len(result[0]), len(result[1])))
+    if mismatches:
+        print('columnar: backends differ', file=sys.stderr)
+        exit(1)
+
+
+def crosscheck_field(stations, qsos, rng):
+    """
+        Logs for a field of stations that worked each other, and what
+        crosscheck() should make of them: the other side of most QSOs is in
+        the other log a minute or two off, some calls are miscopied, some QSOs
+        are missing from the other log and some are with stations that sent
+        no log
+    """
+    calls = ['K{}{}'.format(chr(ord('A') + i % 26), i) for i in range(stations)]
+    start = datetime.datetime(2024, 1, 6)
+    logs = {call: [] for call in calls}
+    expected = collections.Counter()
+
+    def qso(call, when, band):
+        rec = adifparser.QSO()
+        rec.call = call
+        rec.qso_date = when.strftime('%Y%m%d')
+        rec.time_on = when.strftime('%H%M%S')
+        rec.band = band
+        rec.mode = 'PSK31'
+        return rec
+
+    for n in range(qsos // 2):
+        a, b = rng.sample(calls, 2)
+        # ten minutes apart, so no two QSOs are close enough in time to be mixed up
+        when = start + datetime.timedelta(seconds=n * 600)
+        band = rng.choice(['20m', '40m'])
+        roll = rng.random()
+        if roll < 0.05:
+            logs[a].append(qso('NL{}'.format(n), when, band))
+            expected['unique'] += 1
+        elif roll < 0.1:
+            logs[a].append(qso(b, when, band))
+            expected['not_in_log'] += 1
+        elif roll < 0.15:
+            # a miscopied call nobody else worked
+            logs[a].append(qso(b + 'X', when, band))
+            logs[b].append(qso(a, when + datetime.timedelta(seconds=rng.randint(-120, 120)), band))
+            expected['busted'] += 1
+            expected['not_in_log'] += 1
+        else:
+            logs[a].append(qso(b, when, band))
+            logs[b].append(qso(a, when + datetime.timedelta(seconds=rng.randint(-120, 120)), band))
+            expected['confirmed'] += 2
+    return logs, expected
+
+
+def bench_crosscheck(args):
+    """ cross-checking a whole field of logs against each other"""
+    logs, expected = crosscheck_field(max(args.records // 500, 2), args.records, random.Random(0))
+    print('crosscheck: {} logs, {} QSOs'.format(len(logs), sum(len(log) for log in logs.values())))
+    elapsed, results = best_of(lambda: crosscheck.crosscheck(logs), args.repeat)
+    found = collections.Counter(result['status'] for log in results.values() for result in log)
+    print('  crosscheck         : {:8.3f}s  {}'.format(elapsed, ', '.join(
+        '{} {}'.format(found[status], status) for status in crosscheck.statuses)))
+    print('  results differ     : {}'.format(+found != +expected))
+
+
+suites = {
+    'tokenizer': bench_tokenizer,
+    'mmap': bench_mmap,
+    'adifcache': bench_adif_cache,
+    'dupes': bench_dupes,
+    'startup': bench_startup,
+    'qth': bench_qth,
+    'cty': bench_cty,
+    'mults': bench_mults,
+    'columnar': bench_columnar,
+    'crosscheck': bench_crosscheck,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checker benchmarks')
+    parser.add_argument('suites', metavar='SUITE', nargs='*', help='One or more of: ' + ', '.join(suites),
+                        default=list(suites))
+    parser.add_argument('--records', dest='records', type=int, default=200000, help='Synthetic log size')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3, help='Best of N runs')
+    args = parser.parse_args()
+
+    for suite in args.suites:
+        if suite not in suites:
+            print('Unknown suite {}: Exiting'.format(suite), file=sys.stderr)
+            exit(1)
+        suites[suite](args)
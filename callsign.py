@@ -0,0 +1,101 @@
+#!/usr/local/bin/python3
+#
+# callsign.py
+#
+# call sign parsing shared by the dupe check, EGB letters and DXCC
+# resolution
+#
+# Logs are full of the same few hundred calls, so parse_call() is cached:
+# every distinct call is split up once per run, however often it's looked at.
+
+import re
+import functools
+import collections
+
+# call:     the whole call, upper case, slashed zeros (Ø) made plain 0s
+# base:     the station's own call (N6HPX in DU1/N6HPX, W9SMR in W9SMR/9)
+# prefix:   the prefix the station is operating under; the base call's own
+#           prefix (N6, W9) unless a / part says otherwise (DU1)
+# suffix:   what follows the base call's prefix (HPX, SMR, X3 in KA3X3)
+# portable: the / parts other than the base call, in order ('DU1',), ('9',), ('P',)
+Callsign = collections.namedtuple('Callsign', ['call', 'base', 'prefix', 'suffix', 'portable'])
+
+# / parts that say how a station is operating rather than where
+portable_suffixes = frozenset(['P', 'M', 'A', 'B', 'QRP', 'QRPP', 'LH', 'MM', 'AM'])
+# prefix: an optional leading digit, letters, then the call area digits
+# (W9, KA3, 3DA0, 2E0); calls that don't look like that fall back to
+# everything up to the last digit
+base_prefix_re = re.compile(r'^(\d?[A-Z]+\d+)')
+fallback_prefix_re = re.compile(r'^(.*\d)')
+
+
+def normalize(call):
+    """ upper case, no surrounding blanks, Ø -> 0"""
+    return call.strip().upper().replace('Ø', '0')
+
+
+def is_location(part):
+    """ True if a / part is a prefix (DU1, KH6, F) rather than /P, /QRP, /9 and the like"""
+    return part not in portable_suffixes and not part.isdigit()
+
+
+@functools.lru_cache(maxsize=65536)
+def call_parts(call):
+    """ the / separated parts of a call sign, normalized, empty ones dropped: DU1/N6HPX -> ('DU1', 'N6HPX')"""
+    return tuple(part for part in normalize(call).split('/') if part)
+
+
+def split_prefix(part):
+    """ (prefix, suffix) of one part: KA3X -> ('KA3', 'X'), KH6 -> ('KH6', '')"""
+    match = base_prefix_re.match(part) or fallback_prefix_re.match(part)
+    prefix = match.group(1) if match else part
+    return prefix, part[len(prefix):]
+
+
+def base_rank(part):
+    """
+        how much a part looks like the station's own call: the longest part,
+        then the one with more after its prefix (W1A over KH6), then the
+        alphabetically last, so the same parts in either order give the same
+        base call (KH6/AB1 and AB1/KH6)
+    """
+    return len(part), len(split_prefix(part)[1]), part
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_call(call):
+    """ split a call sign into a Callsign (see above)"""
+    call = normalize(call)
+    parts = call_parts(call)
+    if not parts:
+        return Callsign(call, '', '', '', ())
+    # the station's own call, wherever it is: DU1/N6HPX, N6HPX/DU1 and W1AW/KH6 alike
+    base = max(parts, key=base_rank)
+    portable = list(parts)
+    portable.remove(base)
+    own_prefix, suffix = split_prefix(base)
+    prefix = own_prefix
+    for part in portable:
+        if is_location(part):
+            prefix = part
+            break
+    return Callsign(call, base, prefix, suffix, tuple(portable))
+
+
+@functools.lru_cache(maxsize=65536)
+def station(call):
+    """
+        the call for telling stations apart: the base call, plus the prefix
+        it's operating under if that's somewhere else (W9SMR/9 and W9SMR/P
+        are W9SMR, DU1/N6HPX stays DU1/N6HPX)
+    """
+    parsed = parse_call(call)
+    if parsed.base.startswith(parsed.prefix):
+        return parsed.base
+    return parsed.prefix + '/' + parsed.base
+
+
+if __name__ == '__main__':
+    import sys
+    for arg in sys.argv[1:]:
+        print(parse_call(arg), station(arg))
@@ -0,0 +1,270 @@
+#!/usr/local/bin/python3
+#
+# columnar.py
+#
+# optional NumPy backend for contests.run_contest()
+#
+# For batch scoring (score_all.py over every entrant and year) a log's QSOs
+# are loaded into columns -- dupe keys, band, mode, DXCC and state codes,
+# timestamps -- and the band, mode, window and dupe checks run as array
+# operations instead of once per QSO.  The contests scored by calc_scores()
+# and calc_vd_scores() also count their DXCC and state multipliers off the
+# columns.  The results (valid and invalid entries in log order, error
+# lists, scores) are the same as the plain Python loop; tests/test_columnar.py
+# checks that.
+#
+# A column is built by factorize(): each distinct value is looked at once
+# (normalized, looked up in the valid bands, turned into a timestamp, ...)
+# and the QSOs get its integer code, -1 for None.
+#
+# NumPy is optional: without it available() is False and contests keeps
+# using its own loop.
+
+import contests
+import callsign
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def available():
+    return numpy is not None
+
+
+def factorize(values):
+    """ (codes, levels): codes[i] is values[i]'s index in levels, None is -1"""
+    levels = {}
+    codes = [-1 if value is None else levels.setdefault(value, len(levels)) for value in values]
+    return numpy.array(codes, dtype=numpy.int64), list(levels)
+
+
+def relevel(codes, levels, normalize):
+    """ codes and levels after normalize(level), levels that normalize the same are merged"""
+    new_codes, new_levels = factorize([normalize(level) for level in levels])
+    # the extra -1 on the end is what the -1 (None) codes pick up
+    return numpy.append(new_codes, -1)[codes], new_levels
+
+
+def per_level(levels, test, missing=False, dtype=bool):
+    """ test(level) for each level, plus missing at the end for the -1 (None) code"""
+    return numpy.array([test(level) for level in levels] + [missing], dtype=dtype)
+
+
+def lookup(levels, test):
+    """ boolean per level, plus a False at the end for the -1 (None) code"""
+    return per_level(levels, test)
+
+
+def dupe_value(data, field):
+    """ what dupe_key() compares for one field"""
+    if field == 'call':
+        data = callsign.station(data)
+    return data.lower()
+
+
+def dupe_keys(records, dupe_fields):
+    """
+        An integer per QSO, the same for QSOs whose dupe_key() is the same,
+        -1 where dupe_key() is None (the QSO is missing one of the fields)
+    """
+    keys = numpy.zeros(len(records), dtype=numpy.int64)
+    missing = numpy.zeros(len(records), dtype=bool)
+    radix = 1
+    for field in dupe_fields:
+        codes, levels = factorize([record.value(field) for record in records])
+        codes, levels = relevel(codes, levels, lambda data: dupe_value(data, field))
+        missing |= codes < 0
+        size = max(len(levels), 1)
+        if radix * size >= 2 ** 62:
+            # renumber the keys so far, there can't be more of them than QSOs
+            radix_keys, keys = numpy.unique(keys, return_inverse=True)
+            radix = len(radix_keys)
+        # mixed radix packing, one digit per dupe field
+        keys = keys * size + numpy.maximum(codes, 0)
+        radix *= size
+    keys[missing] = -1
+    return keys
+
+
+def timestamps(records):
+    """ qso_timestamp() for every QSO; QSO_DATE and TIME_ON are only worked out once per distinct value"""
+    dates, date_levels = factorize([record.qso_date for record in records])
+    times, time_levels = factorize([record.time_on for record in records])
+    days = per_level(date_levels, contests.qso_day, -1, numpy.int64)[dates]
+    seconds = per_level(time_levels, contests.time_seconds, -1, numpy.int64)[times]
+    stamps = days + seconds
+    # anything but YYYYMMDD and HHMM/HHMMSS goes the long way (and fails the same way)
+    for i in numpy.flatnonzero((days < 0) | (seconds < 0)).tolist():
+        stamps[i] = contests.qso_timestamp(records[i].qso_date, records[i].time_on)
+    return stamps
+
+
+def lower(value):
+    return value.lower()
+
+
+def upper(value):
+    return value.upper()
+
+
+def load_columns(records, dupe_fields=contests.dupe_fields):
+    """ the columns the checks and the multiplier counts run on"""
+    columns = {'count': len(records), 'dupe_key': dupe_keys(records, dupe_fields)}
+    codes, levels = factorize([record.band for record in records])
+    columns['band'], columns['bands'] = relevel(codes, levels, lower)
+    codes, levels = factorize([record.mode for record in records])
+    columns['mode'], columns['modes'] = relevel(codes, levels, lower)
+    columns['timestamp'] = timestamps(records)
+    columns['dxcc'], columns['dxccs'] = factorize([record.dxcc for record in records])
+    columns['has_states'] = lookup(columns['dxccs'], contests.dxcc_has_states)
+    # count_dxcc_state() counts states upper cased
+    codes, levels = factorize([record.state for record in records])
+    columns['state'], columns['states'] = relevel(codes, levels, upper)
+    return columns
+
+
+def window_mask(columns, conditions, summary):
+    """ rec_in_window() for every QSO"""
+    stamps = columns['timestamp']
+    start = contests.timestamp(conditions['contest_start'])
+    end = contests.timestamp(conditions['contest_end'])
+    in_contest = (stamps >= start) & (stamps <= end)
+    in_window = numpy.zeros(len(stamps), dtype=bool)
+    # like rec_in_window(), the blocks are only worked out once a QSO is inside the contest
+    if in_contest.any():
+        for block_start, block_end in contests.get_block_windows(conditions, summary):
+            in_window |= (stamps >= block_start) & (stamps <= block_end)
+    return in_contest & in_window
+
+
+def dupe_mask(columns, checked):
+    """
+        rec_is_not_dupe() for every QSO, negated.  A QSO is a dupe when an
+        earlier QSO with the same key passed the other checks: the first such
+        QSO is the valid one, everything after it with that key is a dupe.
+        A QSO without a key is a dupe once any QSO is valid, and the first
+        QSO to pass the other checks is always valid
+    """
+    keys = columns['dupe_key']
+    position = numpy.arange(len(keys))
+    dupe = numpy.zeros(len(keys), dtype=bool)
+    passed = numpy.flatnonzero(checked)
+    if len(passed) == 0:
+        return dupe
+    order = numpy.flatnonzero(checked & (keys >= 0))
+    if len(order) != 0:
+        unique_keys, first = numpy.unique(keys[order], return_index=True)
+        first_valid = order[first]
+        pos = numpy.searchsorted(unique_keys, keys)
+        pos = numpy.minimum(pos, len(unique_keys) - 1)
+        found = unique_keys[pos] == keys
+        dupe = numpy.where(found, first_valid[pos], len(keys)) < position
+    return dupe | ((keys < 0) & (position > passed[0]))
+
+
+def check_columns(columns, conditions, summary):
+    """ the four test_record() checks as (error name, failed mask) pairs, in test_record() order"""
+    valid_bands = conditions['valid_bands']
+    valid_modes = conditions['valid_modes']
+    bad_band = ~lookup(columns['bands'], lambda band: band in valid_bands)[columns['band']]
+    bad_window = ~window_mask(columns, conditions, summary)
+    bad_mode = ~lookup(columns['modes'], lambda mode: mode in valid_modes)[columns['mode']]
+    dupe = dupe_mask(columns, ~(bad_band | bad_window | bad_mode))
+    return [('not_valid_band', bad_band), ('not_in_window', bad_window), ('is_not_psk', bad_mode),
+            ('is_dupe', dupe)]
+
+
+def validate(records, columns, conditions, summary):
+    """
+        test_record() for a whole log: returns valid_records, invalid_records
+        (the run_contest() lists) and the positions of the valid records
+    """
+    checks = check_columns(columns, conditions, summary)
+    # one bit per check, so each QSO's errors are a lookup
+    failed = numpy.zeros(len(records), dtype=numpy.int64)
+    for bit, (name, mask) in enumerate(checks):
+        failed |= mask.astype(numpy.int64) << bit
+    errors = [[name for bit, (name, mask) in enumerate(checks) if code >> bit & 1] for code in range(1 << len(checks))]
+    codes = failed.tolist()
+    invalid_records = []
+    for i in numpy.flatnonzero(failed).tolist():
+        invalid_records.append({'data': records[i], 'errors': list(errors[codes[i]])})
+    rows = numpy.flatnonzero(failed == 0)
+    valid_records = [records[i] for i in rows.tolist()]
+    return valid_records, invalid_records, rows
+
+
+def tally(records, rows, codes, levels):
+    """ MultiplierTally of the codes of records[rows] (in log order), -1 codes aren't counted"""
+    result = contests.MultiplierTally()
+    worked = codes[rows]
+    counted = rows[worked >= 0]
+    found, first = numpy.unique(codes[counted], return_index=True)
+    # first-worked order, like add() one QSO at a time
+    order = numpy.argsort(first)
+    for code, i in zip(found[order].tolist(), counted[first[order]].tolist()):
+        result.add(levels[code], records[i])
+    return result
+
+
+def dxcc_state_tallies(records, rows, columns):
+    """ count_dxcc_state() over records[rows]: the dxcc and state MultiplierTally"""
+    dxcc = tally(records, rows, columns['dxcc'], columns['dxccs'])
+    dxcc.errors = [records[i] for i in rows[columns['dxcc'][rows] < 0].tolist()]
+    state_rows = rows[columns['has_states'][columns['dxcc'][rows]]]
+    state = tally(records, state_rows, columns['state'], columns['states'])
+    return dxcc, state
+
+
+def calc_scores(records, rows, columns):
+    """ contests.calc_scores() for records[rows]"""
+    scores = {}
+    scores['q-points'] = len(rows)
+    scores['mults'] = {}
+    dxcc, state = dxcc_state_tallies(records, rows, columns)
+    scores['mults']['dxcc'], scores['mults']['state'] = contests.dxcc_state_mults(dxcc, state)
+    scores['total'] = (len(scores['mults']['dxcc']['data']) + len(scores['mults']['state'])) * (
+            scores['q-points'])
+    return scores
+
+
+def calc_vd_scores(records, rows, columns):
+    """ contests.calc_vd_scores() for records[rows]"""
+    scores = {}
+    scores['q-points'] = len(rows)
+    scores['mults'] = {}
+    scores['mults']['yl'] = sum(1 for i in rows.tolist() if contests.get_om_yl(records[i]) == 'YL')
+    dxcc, state = dxcc_state_tallies(records, rows, columns)
+    scores['mults']['dxcc'], scores['mults']['state'] = contests.dxcc_state_mults(dxcc, state)
+    scores['total'] = (len(scores['mults']['dxcc']['data']) + len(scores['mults']['state'])) * (
+            scores['q-points'] + scores['mults']['yl'])
+    return scores
+
+
+# contests scorers with a column version; the rest get the valid records
+scorers = {
+    contests.calc_scores: calc_scores,
+    contests.calc_vd_scores: calc_vd_scores,
+}
+
+
+def run_contest(spec, adif_files, conditions, summary):
+    """ contests.run_contest() with the checks done on columns"""
+    if spec['prepare'] is not None:
+        conditions = spec['prepare'](summary, conditions)
+    records = []
+    for entry in adif_files:
+        for s_record in contests.synthesize_log(adif_files[entry]):
+            for enricher in spec['enrichers']:
+                enricher(s_record, conditions)
+            records.append(s_record)
+    columns = load_columns(records, conditions.get('dupe_fields', contests.dupe_fields))
+    valid_records, invalid_records, rows = validate(records, columns, conditions, summary)
+    scorer = scorers.get(spec['scorer'])
+    if scorer is None:
+        scores = spec['scorer'](valid_records, *[conditions[name] for name in spec['scorer_args']])
+    else:
+        scores = scorer(records, rows, columns)
+    return valid_records, invalid_records, scores
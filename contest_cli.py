@@ -0,0 +1,118 @@
+#!/usr/local/bin/python3
+#
+# contest_cli.py
+#
+# command line shared by the contest scripts (pskfest.py, tdw.py, ...)
+#
+# TODO: properly handle multiple files at the same time
+# TODO: add ability to match logs (check logs)
+import sys
+import adifparser
+import contests
+import result_cache
+import argparse
+import pprint
+import os.path
+
+# contests whose --debug dump starts with the conditions (saintpat.py's always did)
+debug_conditions = {'saintpat'}
+
+
+def get_parser(description='Contests Checker'):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--year', metavar='YEAR')
+    parser.add_argument('--summary', metavar='SUMMARY')
+    parser.add_argument('--delim', metavar='DELIMITER', default=',')
+    parser.add_argument('--call', metavar='CALL')
+    parser.add_argument('--adif-summary', dest='adif_from_summary', action='store_true')
+    parser.add_argument('--adif', metavar='ADIF', nargs='*')
+    parser.add_argument('--debug', dest='debug', action='store_true')
+    parser.add_argument('--valid-only', dest='valid_only', action='store_true')
+    parser.add_argument('--score-only', dest='score_only', action='store_true')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Score the log even if the result cache has it')
+    parser.set_defaults(debug=False)
+    parser.set_defaults(adif_from_summary=False)
+    parser.set_defaults(valid_only=False)
+    parser.set_defaults(score_only=False)
+    parser.set_defaults(use_cache=True)
+    return parser
+
+
+def print_report(contest, valid_entries, invalid_entries, scores, conditions, summary, args):
+    """ what a contest script prints for one entrant (summary is the entrant's summary row)"""
+    spec = contests.contest_specs[contest]
+    entries_args = [conditions[name] for name in spec['print_entries_args']]
+    if args.score_only:
+        spec['print_score'](scores, summary, args)
+    else:
+        spec['print_title_block'](summary)
+        spec['print_score'](scores, summary, args)
+        if valid_entries:
+            spec['print_entries'](valid_entries, *entries_args, valid=True)
+        if not args.valid_only:
+            if invalid_entries:
+                spec['print_entries'](invalid_entries, *entries_args, valid=False)
+
+
+def main(contest, argv=None):
+    args = get_parser().parse_args(argv)
+
+    if args.year:
+        # TODO: Move try block into set_conditions. This is too broad as-is
+        try:
+            conditions = contests.set_conditions(int(args.year), contest)
+        except ValueError:
+            print("Invalid year given (must be in the form YYYY): Exiting", file=sys.stderr)
+            exit(1)
+    else:
+        print("No year given: Exiting", file=sys.stderr)
+        exit(1)
+
+    summary = contests.summary_parser(args.summary, args.delim)
+    if args.adif_from_summary:
+        adif_paths = [summary[args.call.upper()]['adif_file']]
+    else:
+        adif_paths = args.adif
+    adif_files = {}
+    for adif in adif_paths:
+        try:
+            rootname, ext = os.path.splitext(adif)
+        except FileNotFoundError:
+            print('File {} not found; skipping'.format(adif), file=sys.stderr)
+        else:
+            name = os.path.basename(rootname)
+            adif_files[name] = adifparser.iter_records(adif, conditions['adif_fields'])
+
+    if len(adif_files) == 0:
+        print("No files found: Exiting", file=sys.stderr)
+        exit(1)
+
+    cache_key = None
+    result = None
+    if args.use_cache:
+        cache_key = result_cache.result_key(contest, args.year, summary[args.call.upper()], adif_paths)
+        result = result_cache.get(cache_key)
+    if result is None:
+        result = contests.run_contest(contests.contest_specs[contest], adif_files, conditions,
+                                      summary[args.call.upper()])
+        result_cache.put(cache_key, result)
+    valid_entries, invalid_entries, scores = result
+
+    if args.debug:
+        if contest in debug_conditions:
+            pprint.pprint(conditions)
+        pprint.pprint(valid_entries)
+        pprint.pprint(summary[args.call.upper()])
+        pprint.pprint(scores)
+        pprint.pprint(invalid_entries)
+
+    print_report(contest, valid_entries, invalid_entries, scores, conditions, summary[args.call.upper()], args)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in contests.contest_specs:
+        print('usage: contest_cli.py CONTEST [options]  (CONTEST is one of: {})'.format(
+            ', '.join(contests.contest_specs)), file=sys.stderr)
+        exit(1)
+    main(sys.argv[1], sys.argv[2:])
@@ -7,15 +7,17 @@
 # Things to add
 # TODO : handle missing MODE exception (W3SW example)
 # TODO: look for 070 numbers if none provided in summary for header outputs
-# TODO: handle the case of mobile calls (eg, W9SMR and W9SMR/9 are the same thing) This is fixed in TDW
-#       but there are other places where this is helpful
 # TODO: Add check for invalid year in all contests (see firecracker.py for example)
 # TODO: Add check for missing minimum fields (WA3GM 2022 TDW for example of missing call and QSO_date)
 
+import os
 import re
 import sys
+import bisect
+import functools
 import datetime
 import members
+import callsign
 import calendar
 
 # Enumerations
@@ -590,10 +592,192 @@ arrl_section_to_state = {
     'WY': {'state': 'WY', 'name': 'Wyoming', 'dxcc': [291]},
 }
 
+# ADIF fields read while scoring: the QSO itself plus the fallbacks used by
+# synthesize_fields(), get_state() and get_dxcc(), and the exchange column of
+# the print functions.  Logger exports (N1MM, Log4OM, ...) carry 40+ fields per
+# QSO; anything not listed here is skipped by the parser.
+qso_fields = ['call', 'qso_date', 'qso_date_off', 'time_on', 'time_off', 'band', 'freq', 'mode', 'submode',
+              'dxcc', 'state', 've_prov', 'country', 'qth', 'arrl_sect', 'section']
+exchange_fields = ['srx_string', 'srx', 'rst_rcvd', 'comment', 'notes', 'app_n1mm_exchange1', 'app_n1mm_misctext',
+                   'name', 'other', 'award']
+# extra places get_om_yl() looks for the Valentine's Sprint
+om_yl_fields = ['class']
+
+# where get_state(), get_om_yl() and the exchange column look, best guess first
+state_search_fields = ['app_n1mm_exchange1', 'app_n1mm_misctext', 'srx_string', 'notes', 'rst_rcvd', 'srx', 'comment']
+om_yl_search_fields = ['app_n1mm_misctext', 'srx_string', 'srx', 'rst_rcvd', 'comment', 'notes', 'name', 'class',
+                       'other', 'award']
+exchange_display_fields = ['srx_string', 'srx', 'rst_rcvd', 'comment', 'notes', 'app_n1mm_misctext', 'name', 'other',
+                           'award']
+# exchange fields are split into tokens on any single non-word character; QTH only on commas and spaces
+exchange_split = re.compile(r'[\W\s]{1}')
+qth_split = re.compile(r'[,\s]{1}')
+
+# Band edges in MHz (inclusive), sorted by the low edge for bisect.  The band
+# names are the shared strings every QSO's band is set to.
+band_plan = [
+    (1.8, 2.0, '160m'),
+    (3.5, 4.0, '80m'),
+    (5.06, 5.45, '60m'),
+    (7.0, 7.3, '40m'),
+    (10.1, 10.15, '30m'),
+    (14.0, 14.35, '20m'),
+    (18.068, 18.168, '17m'),
+    (21.0, 21.45, '15m'),
+    (24.890, 24.99, '12m'),
+    (28.0, 29.7, '10m'),
+    (50.0, 54.0, '6m'),
+    (144.0, 148.0, '2m'),
+    (420.0, 450.0, '70cm'),
+]
+band_edges = [low for low, high, band in band_plan]
+# FREQ units tried in order: MHz, kHz, Hz
+freq_scales = [1, 1000, 1000000]
+
+# QSO fields that make two contacts the same contact.  Every contest counts
+# a station once per band and mode, so set_conditions() gives them all this
+# key; the checks read conditions['dupe_fields'], which is where a contest
+# with another rule (eg, once per band regardless of mode) would change it
+dupe_fields = ('call', 'band', 'mode')
 
 # End of enumerations
 
 
+def get_name_index(tables, upper_names=True):
+    """
+        Reverse lookup of name -> upper case key, built from the tables in
+        order so the first table/entry wins, the same as walking them one
+        after the other
+    """
+    index = {}
+    for table in tables:
+        for key in table:
+            name = table[key]['name']
+            if upper_names:
+                name = name.upper()
+            index.setdefault(name, key.upper())
+    return index
+
+
+# Reverse lookups so get_state() and get_dxcc() don't walk the tables per token
+state_names = get_name_index([dxcc_291_states, dxcc_1_states])
+state_codes = set(dxcc_291_states) | set(dxcc_1_states) | {'AK', 'HI'}
+# entity names are compared as-is with upper cased log data, so don't upper case them here
+dxcc_names = get_name_index([dxcc_entities], upper_names=False)
+dxcc_position = {entity.upper(): position for position, entity in enumerate(dxcc_entities)}
+
+# Call sign -> DXCC entity, for QSOs that have nothing else to go on.  The
+# prefixes come from a cty.dat style table: an entity line (name, CQ zone,
+# ITU zone, continent, lat, lon, UTC offset, primary prefix) followed by its
+# prefixes up to a ';', with =CALL entries for calls that don't follow their
+# prefix.  The full cty.dat from country-files.com can be dropped in as is.
+cty_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cty.dat')
+# cty.dat entity names that dxcc_entities spells differently
+cty_entity_aliases = {
+    'UNITED STATES': '291',
+    'FED. REP. OF GERMANY': '230',
+    'US VIRGIN IS.': '285',
+    'NORTH MACEDONIA': '502',
+    'KOSOVO': '522',
+    'VIETNAM': '293',
+    'DPR OF KOREA': '344',
+    'CENTRAL AFRICAN REPUBLIC': '408',
+    'KINGDOM OF ESWATINI': '468',
+    'SINT MAARTEN': '518',
+    'ST. BARTHELEMY': '516',
+    'ST. MARTIN': '213',
+    'REPUBLIC OF SOUTH SUDAN': '521',
+    'SOV MIL ORDER OF MALTA': '246',
+    'UNITED NATIONS HQ': '289',
+    'VIENNA INTL CTR': '206',
+}
+# zone/lat/lon overrides on a cty.dat prefix: (CQ) [ITU] <lat/lon> {continent} ~offset~
+cty_overrides = re.compile(r'[(\[<{~].*')
+# maritime and aeronautical mobile aren't in any entity
+no_entity_suffixes = frozenset(['MM', 'AM'])
+_cty = None
+
+
+def cty_entity_code(name):
+    """ dxcc_entities code for a cty.dat entity name, or None"""
+    name = name.upper()
+    if name in cty_entity_aliases:
+        return cty_entity_aliases[name]
+    name = name.replace('ISLANDS', 'IS.').replace('ISLAND', 'I.')
+    return dxcc_names.get(name)
+
+
+def read_cty(inputfile=cty_file):
+    """
+        Returns the prefix trie (nested dicts, one level per character, ''
+        holding the entity code where a prefix ends) and the exact call dict
+        from a cty.dat style table.  Entities dxcc_entities doesn't have
+        (cty.dat's *WAE-only ones for example) are left out
+    """
+    trie = {}
+    exact = {}
+    with open(inputfile, encoding='ISO-8859-1') as f:
+        entities = f.read().split(';')
+    for entity in entities:
+        fields = entity.split(':')
+        if len(fields) != 9:
+            continue
+        code = cty_entity_code(fields[0].strip())
+        if code is None or fields[7].strip().startswith('*'):
+            continue
+        for prefix in fields[8].split(','):
+            prefix = cty_overrides.sub('', prefix).strip().upper()
+            if prefix.startswith('='):
+                exact[prefix[1:]] = code
+            elif prefix:
+                node = trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node[''] = code
+    return trie, exact
+
+
+def get_cty():
+    """ read_cty() the first time it's needed; most logs never get that far"""
+    global _cty
+    if _cty is None:
+        _cty = read_cty()
+    return _cty
+
+
+def prefix_dxcc(prefix):
+    """ entity of the longest cty prefix that prefix starts with, or None"""
+    node = get_cty()[0]
+    code = None
+    for char in prefix:
+        node = node.get(char)
+        if node is None:
+            break
+        code = node.get('', code)
+    return code
+
+
+@functools.lru_cache(maxsize=65536)
+def call_dxcc(call):
+    """
+        DXCC entity code for a call sign, or None.  Portable calls go by the
+        prefix they're operating under (DU1/N6HPX, W1AW/KH6); /P, /M, /QRP,
+        call area digits and the like are ignored, /MM and /AM are in no entity
+    """
+    exact = get_cty()[1]
+    parsed = callsign.parse_call(call)
+    if parsed.call in exact:
+        return exact[parsed.call]
+    if not parsed.base or no_entity_suffixes.intersection(parsed.portable):
+        return None
+    if not parsed.base.startswith(parsed.prefix):
+        return prefix_dxcc(parsed.prefix)
+    if parsed.base in exact:
+        return exact[parsed.base]
+    # the whole call, so longer prefixes like VK9N and KH7K get their chance
+    return prefix_dxcc(parsed.base)
+
+
 def summary_parser(inputfile, delim):
     # TODO: standardize entries.csv headers
     import csv
@@ -607,6 +791,41 @@ def summary_parser(inputfile, delim):
     return summary
 
 
+def get_adif_fields(contest=None):
+    """ ADIF fields a contest needs out of a log (hand these to adifparser)"""
+    fields = qso_fields + exchange_fields
+    if contest == 'vdsprint':
+        fields = fields + om_yl_fields
+    return fields
+
+
+def tdw_set_member_conditions(year, conditions):
+    # max_member is the highest 070# that counted in a year that has already been
+    # scored; it's kept so those results don't move.  Years without one match
+    # members by the start/end dates in the member file for each QSO's date.
+    conditions['bonus_stations'] = []
+    conditions['max_member'] = None
+    if year == 2025:
+        conditions['bonus_stations'] = ['KC3FL', 'KC3VPB', 'WA5AMM', 'N8TCP', 'WA1LAD']
+        conditions['max_member'] = 3037  # TDW 2024 maximum
+    if year == 2024:
+        conditions['bonus_stations'] = ['AB8YZ', 'KC3FL', 'KC3VPB', 'KZ3T', 'N0NM', 'VA3TPS', 'WA5AMM', 'VA7GEM']
+        conditions['max_member'] = 3008  # TDW 2024 maximum
+    if year == 2023:
+        conditions['bonus_stations'] = ['N0NM', 'KC3FL', 'K0CIE', 'N5SLY', 'N9JCA', 'VA7GEM', 'OK1VSL', 'WA5AMM']
+        conditions['max_member'] = 2968  # TDW 2023 maximum
+    if year == 2022:
+        conditions['bonus_stations'] = ['K3JT', 'KC3FL', 'KC4TIE', 'N6MG', 'NY7H', 'TI2YO', 'VA3TPS', 'WA5AMM']
+        conditions['max_member'] = 2924  # TDW 2022 maximum
+    elif year == 2021:
+        conditions['bonus_stations'] = ['N5SLY', 'N9AVY', 'KB3RAN', 'N6MG', 'KC3FL', 'KE5PYF', 'KD6TR', 'VA7GEM']
+        conditions['max_member'] = 2842  # TDW 2021 maximum
+    elif year == 2020:
+        conditions['bonus_stations'] = ['N5SLY', 'VA3TPS', 'KC3FL', 'N9AVY', 'KK6KMU', 'VA7GEM']
+        conditions['max_member'] = 2759  # TDW 2020 maximum
+    return conditions
+
+
 def tp_dh_build_date_blocks(summary, conditions):
     conditions['saturday_0000'] = conditions['contest_start']
     conditions['sunday_0000'] = conditions['saturday_0000'] + datetime.timedelta(days=1)
@@ -648,179 +867,93 @@ def tp_dh_build_date_blocks(summary, conditions):
     return conditions
 
 
-def triple_play(adif_files, conditions, summary):
-    conditions = tp_dh_build_date_blocks(summary, conditions)
+# 'python' runs the loop below, 'numpy' hands the checks to columnar.py when
+# NumPy is installed (see run_contest())
+default_backend = os.environ.get('CHECKER_BACKEND', 'python')
+
+
+def run_contest(spec, adif_files, conditions, summary, backend=None):
+    """
+        The one loop every contest goes through: synthesize each QSO, run the
+        spec's (see contest_spec()) enrichers on it, validate it against
+        conditions (bands, modes, window, dupes) and score the valid ones
+        with the spec's scorer.
+        adif_files is a dict of name: records, where records can be the
+        adifparser.iter_records() generator.  backend (default:
+        default_backend) picks how the checks are run; the results are the same
+    """
+    if (backend or default_backend) == 'numpy':
+        import columnar
+        if columnar.available():
+            return columnar.run_contest(spec, adif_files, conditions, summary)
+    if spec['prepare'] is not None:
+        conditions = spec['prepare'](summary, conditions)
+    enrichers = spec['enrichers']
     valid_records = []
     invalid_records = []
+    dupe_index = set()
     # loop through adif files
     # for each adif file, grab summary info
     for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
+        for s_record in synthesize_log(adif_files[entry]):
+            for enricher in enrichers:
+                enricher(s_record, conditions)
+            status, errors = test_record(s_record, conditions, summary, valid_records, dupe_index)
             if errors:
                 invalid_records.append({'data': s_record, 'errors': errors})
             else:
                 valid_records.append(s_record)
-    scores = calc_scores_tp_dh(valid_records)
+    scores = spec['scorer'](valid_records, *[conditions[name] for name in spec['scorer_args']])
     return valid_records, invalid_records, scores
 
 
+def set_member_number(record, conditions):
+    """ enricher: TDW member number for the QSO"""
+    if conditions.get('max_member') is None:
+        # no member number cutoff for the year: go by who was a member on the QSO date
+        record.member_number = get_member_number_on(record)
+    else:
+        record.member_number = get_member_number(record, conditions['max_member'])
+
+
+def triple_play(adif_files, conditions, summary):
+    return run_contest(contest_specs['tripleplay'], adif_files, conditions, summary)
+
+
 def doubleheader(adif_files, conditions, summary):
-    conditions = tp_dh_build_date_blocks(summary, conditions)
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores_tp_dh(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['doubleheader'], adif_files, conditions, summary)
 
 
 def pskfest(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['pskfest'], adif_files, conditions, summary)
 
 
 def vdsprint(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_vd_scores(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['vdsprint'], adif_files, conditions, summary)
 
 
 def saintpats(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores(valid_records)
-    scores['mults']['egb'] = calc_egb(valid_records)
-    scores['total'] += scores['mults']['egb']['bonus']
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['saintpat'], adif_files, conditions, summary)
 
 
 def thirtyone_flavors(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores_31flavors(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['thirtyone'], adif_files, conditions, summary)
 
 
 def tdw(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            s_record['member_number'] = get_member_number(s_record, conditions['max_member'])
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores_tdw(valid_records, conditions['bonus_stations'])
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['tdw'], adif_files, conditions, summary)
 
 
 def firecracker(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['firecracker'], adif_files, conditions, summary)
 
 
 def jayhudak(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['jayhudak'], adif_files, conditions, summary)
 
 
 def greatpumpkin(adif_files, conditions, summary):
-    valid_records = []
-    invalid_records = []
-    # loop through adif files
-    # for each adif file, grab summary info
-    for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, summary, valid_records)
-            if errors:
-                invalid_records.append({'data': s_record, 'errors': errors})
-            else:
-                valid_records.append(s_record)
-    scores = calc_scores(valid_records)
-    return valid_records, invalid_records, scores
+    return run_contest(contest_specs['greatpumpkin'], adif_files, conditions, summary)
 
 
 def synthesize_fields(record):
@@ -831,47 +964,65 @@ def synthesize_fields(record):
     #       both STATE and VE_PROV, etc
 
     # remove fields that have no data
-    keys = []
-    for key in record.keys():  # This loop is because the dict_key is tied to the dict so we can't delete the field
-        if key != 'errors':
-            keys.append(key)
-    for key in keys:
-        if record[key]['length'] == 0:
-            del (record[key])
+    record.drop_empty()
 
     s_record = record
 
     # TODO: input validation for all the elements (for example: NA8W's invalid freq "14070PSK31" in TDW 2021)
-    if 'band' not in record:
-        if 'freq' in record:
-            freq = float(record['freq']['data'].replace(',', '.'))
-            s_record['band'] = get_band_from_freq(freq)
+    if record.band is None:
+        if record.freq is not None:
+            freq = float(record.freq.replace(',', '.'))
+            s_record.band = get_band_from_freq(freq)
         else:
-            s_record['band'] = {'length': 2, 'data': '??'}
-    if 'qso_date' not in record:
-        if 'qso_date_off' in record:
-            s_record['qso_date'] = record['qso_date_off']
+            s_record.band = '??'
+    if record.qso_date is None:
+        if record.qso_date_off is not None:
+            s_record.qso_date = record.qso_date_off
         else:
-            s_record['qso_date'] = {'length': 2, 'data': '??'}
-    if 'time_on' not in record:
-        if 'time_off' in record:
-            s_record['time_on'] = record['time_off']
+            s_record.qso_date = '??'
+    if record.time_on is None:
+        if record.time_off is not None:
+            s_record.time_on = record.time_off
         else:
-            s_record['time_on'] = {'length': 2, 'data': '??'}
-    if 'state' not in record or record['state']['length'] > 2:
+            s_record.time_on = '??'
+    if record.state is None or len(record.state) > 2:
         state = get_state(record)
-        if state:
-            s_record['state'] = state
-    if 'dxcc' not in record:
+        if state is not None:
+            s_record.state = state
+    if record.dxcc is None:
         dxcc = get_dxcc(record)
-        if dxcc:
-            s_record['dxcc'] = dxcc
-    # TODO: this is probably wrong.  The length of mode and submode are probably different
-    if 'submode' in record:  # 31 Flavors put submode in mode
-        s_record['mode'] = record['submode']
+        if dxcc is not None:
+            s_record.dxcc = dxcc
+    if record.submode is not None:  # 31 Flavors put submode in mode
+        s_record.mode = record.submode
     return s_record
 
 
+def synthesize_log(records, chunk=1000):
+    """
+        synthesize_fields() for each of records, yielded as they're done.
+        They're taken a chunk at a time so the BAND of QSOs that only have a
+        FREQ comes from one bands_from_freqs() call (a log sits on a handful
+        of frequencies); records can be a generator
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == chunk:
+            yield from synthesize_batch(batch)
+            batch = []
+    yield from synthesize_batch(batch)
+
+
+def synthesize_batch(records):
+    # an empty BAND or FREQ is dropped by synthesize_fields(), so it doesn't count here either
+    only_freq = [record for record in records if not record.band and record.freq]
+    for record, band in zip(only_freq, bands_from_freqs([record.freq for record in only_freq])):
+        record.band = band
+    for record in records:
+        yield synthesize_fields(record)
+
+
 def set_conditions(year, contest):
     """
         This is where our logic details are for each contest to dynamically
@@ -1015,6 +1166,10 @@ def set_conditions(year, contest):
             'contest_end': datetime.datetime(year, month, contest_day + 2, 23, 59, 59, 0),
         }
 
+    conditions['adif_fields'] = get_adif_fields(contest)
+    conditions['dupe_fields'] = dupe_fields
+    if contest in contest_specs and contest_specs[contest]['year_conditions'] is not None:
+        conditions = contest_specs[contest]['year_conditions'](year, conditions)
     return conditions
 
 
@@ -1046,307 +1201,261 @@ def get_last_day_of_month(year, month, day):
     return last_day
 
 
+def get_tokens(record, field):
+    """
+        Upper cased tokens of one of the record's exchange-ish fields, or None
+        if it doesn't have the field.  The split is cached on the record so
+        get_state(), get_om_yl(), etc. only tokenize a field once
+    """
+    data = record.value(field)
+    if data is None:
+        return None
+    if record.tokens is None:
+        record.tokens = {}
+    cached = record.tokens.get(field)
+    # the field may have been filled in (synthesize_fields) since it was split
+    if cached is None or cached[0] is not data:
+        cached = (data, [element.upper() for element in exchange_split.split(data)])
+        record.tokens[field] = cached
+    return cached[1]
+
+
+def find_token(record, fields, match):
+    """
+        Walk fields in order and return the first non None match(token) from
+        their tokens, or None
+    """
+    for field in fields:
+        tokens = get_tokens(record, field)
+        if tokens is not None:
+            for element in tokens:
+                found = match(element)
+                if found is not None:
+                    return found
+    return None
+
+
+def om_yl_from_token(element):
+    if element in ['OM', 'YL']:
+        return element
+    return None
+
+
+def state_from_token(element):
+    if element in state_codes:
+        return element
+    if element in arrl_section_to_state:
+        return arrl_section_to_state[element]['state']
+    return None
+
+
+def state_or_name_from_token(element):
+    # the STATE field sometimes has the name spelled out (eg, ON // ONTARIO)
+    if element in state_codes:
+        return element
+    if element in state_names:
+        return state_names[element]
+    if element in arrl_section_to_state:
+        return arrl_section_to_state[element]['state']
+    return None
+
+
 def get_om_yl(record):
     """ look for OM or YL in various places for the Valentine's Sprint"""
     # TODO : Add a search in the summary for YL
-
-    if 'app_n1mm_misctext' in record:
-        n1mm_data = re.split('[\W\s]{1}', record['app_n1mm_misctext']['data'])
-        for element in n1mm_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'srx_string' in record:
-        srx_data = re.split('[\W\s]{1}', record['srx_string']['data'])
-        for element in srx_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'srx' in record:
-        srx_data = re.split('[\W\s]{1}', record['srx']['data'])
-        for element in srx_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'rst_rcvd' in record:
-        rst_rcvd_data = re.split('[\W\s]{1}', record['rst_rcvd']['data'])
-        for element in rst_rcvd_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'comment' in record:
-        comment_data = re.split('[\W\s]{1}', record['comment']['data'])
-        for element in comment_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'notes' in record:
-        notes_data = re.split('[\W\s]{1}', record['notes']['data'])
-        for element in notes_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'name' in record:
-        name_data = re.split('[\W\s]{1}', record['name']['data'])
-        for element in name_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'class' in record:
-        class_data = re.split('[\W\s]{1}', record['class']['data'])
-        for element in class_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'other' in record:
-        other_data = re.split('[\W\s]{1}', record['other']['data'])
-        for element in other_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    if 'award' in record:
-        award_data = re.split('[\W\s]{1}', record['award']['data'])
-        for element in award_data:
-            if element.upper() in ['OM', 'YL']:
-                return {'length': len(element), 'data': element.upper()}
-    return None
+    return find_token(record, om_yl_search_fields, om_yl_from_token)
 
 
 def get_state(record):
     """ Walk a list of increasingly poor options to try and find a value for State"""
 
-    if 'state' in record:  # This is here to capture invalid state data (eg, ON // ONTARIO)
-        state_data = re.split('[\W\s]{1}', record['state']['data'])
-        for element in state_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            for key in dxcc_291_states.keys():
-                if element.upper() == dxcc_291_states[key]['name'].upper():
-                    return {'length': len(key), 'data': key.upper()}
-            for key in dxcc_1_states.keys():
-                if element.upper() == dxcc_1_states[key]['name'].upper():
-                    return {'length': len(key), 'data': key.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 've_prov' in record:
-        return record['ve_prov']
-    if 'app_n1mm_exchange1' in record:
-        n1mm_data = re.split('[\W\s]{1}', record['app_n1mm_exchange1']['data'])
-        for element in n1mm_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'app_n1mm_misctext' in record:
-        n1mm_data = re.split('[\W\s]{1}', record['app_n1mm_misctext']['data'])
-        for element in n1mm_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'srx_string' in record:
-        srx_data = re.split('[\W\s]{1}', record['srx_string']['data'])
-        for element in srx_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'notes' in record:
-        notes_data = re.split('[\W\s]{1}', record['notes']['data'])
-        for element in notes_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'rst_rcvd' in record:
-        rst_data = re.split('[\W\s]{1}', record['rst_rcvd']['data'])
-        for element in rst_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'srx' in record:
-        srx_data = re.split('[\W\s]{1}', record['srx']['data'])
-        for element in srx_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'comment' in record:
-        comment_data = re.split('[\W\s]{1}', record['comment']['data'])
-        for element in comment_data:
-            if element.upper() in dxcc_291_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in dxcc_1_states.keys():
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in ['AK', 'HI']:
-                return {'length': len(element), 'data': element.upper()}
-            if element.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                        'data': arrl_section_to_state[element.upper()]['state']}
-    if 'qth' in record:
-        qth_data = record['qth']['data'].upper()
+    state = find_token(record, ['state'], state_or_name_from_token)
+    if state is not None:
+        return state
+    if record.ve_prov is not None:
+        return record.ve_prov
+    state = find_token(record, state_search_fields, state_from_token)
+    if state is not None:
+        return state
+    if record.qth is not None:
+        qth_data = record.qth.upper()
         if len(qth_data) == 2:
-            if qth_data in dxcc_291_states.keys():
-                return {'length': len(qth_data), 'data': qth_data}
-            if qth_data in dxcc_1_states.keys():
-                return {'length': len(qth_data), 'data': qth_data}
-            if qth_data.upper() in ['AK', 'HI']:
-                return {'length': len(qth_data), 'data': qth_data}
-            if qth_data.upper() in arrl_section_to_state:
-                return {'length': len(arrl_section_to_state[qth_data.upper()]['state']),
-                        'data': arrl_section_to_state[qth_data.upper()]['state']}
+            state = state_from_token(qth_data)
+            if state is not None:
+                return state
         elif len(qth_data) > 2:
-            elements = re.split('[,\s]{1}', qth_data)
-            for element in elements:
-                if element in dxcc_291_states.keys():
-                    return {'length': len(element), 'data': element}
-                if element in dxcc_1_states.keys():
-                    return {'length': len(element), 'data': element}
-                if element.upper() in ['AK', 'HI']:
-                    return {'length': len(element), 'data': element.upper()}
-                if element.upper() in arrl_section_to_state:
-                    return {'length': len(arrl_section_to_state[element.upper()]['state']),
-                            'data': arrl_section_to_state[element.upper()]['state']}
-    if 'arrl_sect' in record:  # Scraping the bottom of the barrel (section is not the same as State)
-        if record['arrl_sect']['data'] in arrl_section_to_state:
-            section_state = arrl_section_to_state[record['arrl_sect']['data']]['state']
-            return {'length': len(section_state), 'data': section_state}
-    if 'section' in record:  # Scraping the bottom of the barrel (section is not the same as State)
-        if record['section']['data'] in arrl_section_to_state:
-            section_state = arrl_section_to_state[record['section']['data']]['state']
-            return {'length': len(section_state), 'data': section_state}
+            for element in qth_split.split(qth_data):
+                state = state_from_token(element)
+                if state is not None:
+                    return state
+    # Scraping the bottom of the barrel (section is not the same as State)
+    for section_field in ['arrl_sect', 'section']:
+        section = record.value(section_field)
+        if section is not None and section in arrl_section_to_state:
+            return arrl_section_to_state[section]['state']
     return None
 
 
 def get_dxcc(record):
-    if 'country' in record:
-        if record['country']['data'].upper() in ['US', 'USA', 'UNITED STATES']:
-            return {'length': 3, 'data': '291'}
-        for entity in dxcc_entities:
-            if record['country']['data'].upper() == dxcc_entities[entity]['name']:
-                return {'length': len(entity), 'data': entity.upper()}
-    if 've_prov' in record:
-        return {'length': 1, 'data': '1'}
-    if 'state' in record:
-        if record['state']['data'].upper() in dxcc_1_states.keys():
-            return {'length': 1, 'data': '1'}
-        elif record['state']['data'].upper() in dxcc_291_states.keys():
-            return {'length': 3, 'data': '291'}
-        elif record['state']['data'].upper() == 'AK':
-            return {'length': 1, 'data': '6'}
-        elif record['state']['data'].upper() == 'HI':
-            return {'length': 3, 'data': '110'}
-    if 'app_n1mm_exchange1' in record:
-        if record['app_n1mm_exchange1']['data'].upper() in dxcc_1_states.keys():
-            return {'length': 1, 'data': '1'}
-        elif record['app_n1mm_exchange1']['data'].upper() in dxcc_291_states.keys():
-            return {'length': 3, 'data': '291'}
-        else:
-            for entity in dxcc_entities:
-                if record['app_n1mm_exchange1']['data'].upper() == dxcc_entities[entity]['name']:
-                    return {'length': len(entity), 'data': entity.upper()}
-    if 'srx_string' in record:
-        srx_data = re.split('[\W\s]{1}', record['srx_string']['data'])
-        for element in srx_data:
-            for entity in dxcc_entities:
-                if element.upper() == dxcc_entities[entity]['name']:
-                    return {'length': len(entity), 'data': entity.upper()}
-    if 'qth' in record:
-        if record['qth']['data'].upper() in ['US', 'USA', 'UNITED STATES']:
-            return {'length': 3, 'data': '291'}
-        for entity in dxcc_entities:
-            for qth_item in record['qth']['data'].upper().split():
-                if qth_item == dxcc_entities[entity]['name']:
-                    return {'length': len(entity), 'data': entity.upper()}
+    if record.country is not None:
+        if record.country.upper() in ['US', 'USA', 'UNITED STATES']:
+            return '291'
+        if record.country.upper() in dxcc_names:
+            return dxcc_names[record.country.upper()]
+    if record.ve_prov is not None:
+        return '1'
+    if record.state is not None:
+        if record.state.upper() in dxcc_1_states.keys():
+            return '1'
+        elif record.state.upper() in dxcc_291_states.keys():
+            return '291'
+        elif record.state.upper() == 'AK':
+            return '6'
+        elif record.state.upper() == 'HI':
+            return '110'
+    n1mm_exchange = record.value('app_n1mm_exchange1')
+    if n1mm_exchange is not None:
+        if n1mm_exchange.upper() in dxcc_1_states.keys():
+            return '1'
+        elif n1mm_exchange.upper() in dxcc_291_states.keys():
+            return '291'
+        elif n1mm_exchange.upper() in dxcc_names:
+            return dxcc_names[n1mm_exchange.upper()]
+    if record.srx_string is not None:
+        for element in get_tokens(record, 'srx_string'):
+            if element in dxcc_names:
+                return dxcc_names[element]
+    if record.qth is not None:
+        if record.qth.upper() in ['US', 'USA', 'UNITED STATES']:
+            return '291'
+        qth_entities = [dxcc_names[qth_item] for qth_item in record.qth.upper().split() if qth_item in dxcc_names]
+        if qth_entities:
+            # more than one country word: the one listed first in dxcc_entities wins
+            return min(qth_entities, key=dxcc_position.get)
+    if record.call is not None:
+        return call_dxcc(record.call)
+    return None
+
+
+def band_in_mhz(mhz):
+    """ band_plan band for a frequency in MHz, or None"""
+    i = bisect.bisect_right(band_edges, mhz) - 1
+    if i >= 0 and mhz <= band_plan[i][1]:
+        return band_plan[i][2]
     return None
 
 
 def get_band_from_freq(freq):
-    if 1.8 <= freq <= 2.0 or 1800 <= freq <= 2000:
-        band = {'length': 4, 'data': '160m'}
-    elif 3.5 <= freq <= 4.0 or 3500 <= freq <= 4000:
-        band = {'length': 3, 'data': '80m'}
-    elif 5.06 <= freq <= 5.45 or 5060 <= freq <= 5450:
-        band = {'length': 3, 'data': '60m'}
-    elif 7.0 <= freq <= 7.3 or 7000 <= freq <= 7300:
-        band = {'length': 3, 'data': '40m'}
-    elif 10.1 <= freq <= 10.15 or 10100 <= freq <= 10150:
-        band = {'length': 3, 'data': '30m'}
-    elif 14.0 <= freq <= 14.35 or 14000 <= freq <= 14350:
-        band = {'length': 3, 'data': '20m'}
-    elif 18.068 <= freq <= 18.168 or 18068 <= freq <= 18168:
-        band = {'length': 3, 'data': '17m'}
-    elif 21.0 <= freq <= 21.45 or 21000 <= freq <= 21450:
-        band = {'length': 3, 'data': '15m'}
-    elif 24.890 <= freq <= 24.99 or 24890 <= freq <= 24990:
-        band = {'length': 3, 'data': '12m'}
-    elif 28.0 <= freq <= 29.7 or 28000 <= freq <= 29700:
-        band = {'length': 3, 'data': '10m'}
-    else:
-        band = {'length': 2, 'data': '??'}
-    return band
+    """
+        Band for a frequency.  ADIF says FREQ is MHz, but logs turn up with
+        kHz and Hz too; no band_plan band is in reach of another unit's
+        numbers, so try each unit in turn.  Returns '??' if nothing fits
+    """
+    for scale in freq_scales:
+        band = band_in_mhz(freq / scale)
+        if band is not None:
+            return band
+    return '??'
+
+
+def bands_from_freqs(freqs):
+    """
+        get_band_from_freq() for a list of frequencies (numbers, or ADIF FREQ
+        strings).  Logs sit on a handful of frequencies, so each distinct
+        value is only looked up once
+    """
+    seen = {}
+    bands = []
+    for freq in freqs:
+        band = seen.get(freq)
+        if band is None:
+            if isinstance(freq, str):
+                band = get_band_from_freq(float(freq.replace(',', '.')))
+            else:
+                band = get_band_from_freq(freq)
+            seen[freq] = band
+        bands.append(band)
+    return bands
 
 
 def get_member_number(record, max_valid=None):
     """ look for member numbers in various places for TDW"""
     if max_valid is None:
-        matchmember = members.is_member(record['call']['data'])
+        matchmember = members.is_member(record.call)
     else:
-        matchmember = members.is_member(record['call']['data'], max_valid)
+        matchmember = members.is_member(record.call, max_valid)
     if matchmember:
         return matchmember
     else:
         return '0000'
 
 
+def get_member_number_on(record):
+    """ member number the station held on the QSO date, going by the member file dates"""
+    matchmember = members.is_member_on(record.call, record.qso_date)
+    if matchmember:
+        return matchmember
+    else:
+        return '0000'
+
+
+class MultiplierTally:
+    ''' One kind of multiplier (DXCC entities, states, members, ...)
+        add() counts a multiplier the first time it's worked: data lists them
+        in first-worked order (the lists the print functions read), first
+        maps each one to the QSO that first worked it, and errors collects
+        QSOs that didn't say.  first doubles as the membership test, so a log
+        with hundreds of multipliers doesn't rescan a list per QSO
+    '''
+    __slots__ = ('data', 'first', 'errors')
+
+    def __init__(self):
+        self.data = []
+        self.first = {}
+        self.errors = []
+
+    def add(self, key, rec=None):
+        ''' count key, worked in rec; False if it was already counted'''
+        if key in self.first:
+            return False
+        self.first[key] = rec
+        self.data.append(key)
+        return True
+
+
+@functools.lru_cache(maxsize=None)
+def dxcc_has_states(dxcc):
+    """ True for the entities whose states count as multipliers (US, Alaska, Hawaii and Canada)"""
+    try:
+        return int(dxcc) in (1, 6, 110, 291)
+    except (TypeError, ValueError):
+        return False
+
+
+def count_dxcc_state(rec, dxcc, state):
+    """ count rec toward the dxcc and state MultiplierTally"""
+    if rec.dxcc is None:
+        dxcc.errors.append(rec)
+    else:
+        dxcc.add(rec.dxcc, rec)
+    # For now, assuming only US and Canada for states
+    if rec.state is not None and dxcc_has_states(rec.dxcc):
+        state.add(rec.state.upper(), rec)
+
+
+def dxcc_state_mults(dxcc, state):
+    """ the scores['mults'] entries the print functions read"""
+    return {'data': dxcc.data, 'errors': dxcc.errors}, state.data
+
+
 def calc_scores(valid_records):
     scores = {}
     scores['q-points'] = len(valid_records)
     scores['mults'] = {}
-    scores['mults']['dxcc'] = {}
-    scores['mults']['dxcc']['data'] = []
-    scores['mults']['dxcc']['errors'] = []
-    scores['mults']['state'] = []
+    dxcc, state = MultiplierTally(), MultiplierTally()
     for rec in valid_records:
-        try:
-            if rec['dxcc']['data'] not in scores['mults']['dxcc']['data']:
-                scores['mults']['dxcc']['data'].append(rec['dxcc']['data'])
-        except:
-            scores['mults']['dxcc']['errors'].append(rec)
-        try:
-            # For now, assuming only US and Canada for states
-            if rec['state']['data'].upper() not in scores['mults']['state'] and \
-                    int(rec['dxcc']['data']) in [1, 6, 110, 291]:
-                scores['mults']['state'].append(rec['state']['data'].upper())
-        except:
-            pass
+        count_dxcc_state(rec, dxcc, state)
+    scores['mults']['dxcc'], scores['mults']['state'] = dxcc_state_mults(dxcc, state)
     scores['total'] = (len(scores['mults']['dxcc']['data']) + len(scores['mults']['state'])) * (
             scores['q-points'])
     return scores
@@ -1357,31 +1466,12 @@ def calc_vd_scores(valid_records):
     scores['q-points'] = len(valid_records)
     scores['mults'] = {}
     scores['mults']['yl'] = 0
-    scores['mults']['dxcc'] = {}
-    scores['mults']['dxcc']['data'] = []
-    scores['mults']['dxcc']['errors'] = []
-    scores['mults']['state'] = []
+    dxcc, state = MultiplierTally(), MultiplierTally()
     for rec in valid_records:
-        om_yl = get_om_yl(rec)
-        try:
-            if om_yl['data'] == 'YL':  # VD Sprint Mult
-                scores['mults']['yl'] += 1
-        except TypeError:
-            pass
-        except KeyError:
-            pass
-        try:
-            if rec['dxcc']['data'] not in scores['mults']['dxcc']['data']:
-                scores['mults']['dxcc']['data'].append(rec['dxcc']['data'])
-        except:
-            scores['mults']['dxcc']['errors'].append(rec)
-        try:
-            # For now, assuming only US and Canada for states
-            if rec['state']['data'].upper() not in scores['mults']['state'] and \
-                    int(rec['dxcc']['data']) in [1, 6, 110, 291]:
-                scores['mults']['state'].append(rec['state']['data'].upper())
-        except:
-            pass
+        if get_om_yl(rec) == 'YL':  # VD Sprint Mult
+            scores['mults']['yl'] += 1
+        count_dxcc_state(rec, dxcc, state)
+    scores['mults']['dxcc'], scores['mults']['state'] = dxcc_state_mults(dxcc, state)
     scores['total'] = (len(scores['mults']['dxcc']['data']) + len(scores['mults']['state'])) * (
             scores['q-points'] + scores['mults']['yl'])
     return scores
@@ -1414,22 +1504,19 @@ def calc_egb(valid_records):
     calls_shortlist = { 'r_count': 0, 'g_count': 0 }
 
     for rec in valid_records:
-        # TODO: Make the suffix identification more robust (ie, account for weird digit placement)
-        #       for example: DU1/N6HPX should be "H"  Find some way to split on /, then pull out
-        #       the base callsign
-
-        suffix = re.split('[Ø\d]+', rec['call']['data'])
+        # the first letter after the base call's prefix: DU1/N6HPX is "H"
+        suffix = callsign.parse_call(rec.call).suffix
         try:
-            testchar = suffix[1][0].upper()
-        except:
+            testchar = suffix[0]
+        except IndexError:
             # TODO: This shouldn't happen unless suffix is broken.  Should invalidate in valid_records first
-            print("can't validate {}, call looks invalid. Skipping EGB score".format(rec['call']['data']), file=sys.stderr)
+            print("can't validate {}, call looks invalid. Skipping EGB score".format(rec.call), file=sys.stderr)
         else:
             # build letter/call matrix list of possible callsigns
             if testchar in letters:
                 calls_shortlist.setdefault(testchar,[])
-                if rec['call']['data'] not in calls_shortlist[testchar]:
-                    calls_shortlist[testchar].append(rec['call']['data'])
+                if rec.call not in calls_shortlist[testchar]:
+                    calls_shortlist[testchar].append(rec.call)
                     letters.remove(testchar)
                     if testchar == 'R': calls_shortlist['r_count'] += 1
                     if testchar == 'G': calls_shortlist['g_count'] += 1
@@ -1527,6 +1614,14 @@ def calc_egb(valid_records):
     return egb
 
 
+def calc_scores_saintpat(valid_records):
+    """ the usual score plus the Emerald Green Bonus"""
+    scores = calc_scores(valid_records)
+    scores['mults']['egb'] = calc_egb(valid_records)
+    scores['total'] += scores['mults']['egb']['bonus']
+    return scores
+
+
 def calc_scores_31flavors(valid_records):
     scores = {
         'dxccmult': 0,
@@ -1534,30 +1629,20 @@ def calc_scores_31flavors(valid_records):
         'q-points': len(valid_records),
         'mults': {},
     }
+    tallies = {}
     for rec in valid_records:
-        if rec['mode']['data'].lower() in ['qpsk31', 'qpsk63', 'qpsk125']:
-            mode = rec['mode']['data']
-        elif rec['mode']['data'].lower() in ['bpsk31', 'bpsk63', 'bpsk125']:
-            mode = rec['mode']['data']
+        if rec.mode.lower() in ['qpsk31', 'qpsk63', 'qpsk125']:
+            mode = rec.mode
+        elif rec.mode.lower() in ['bpsk31', 'bpsk63', 'bpsk125']:
+            mode = rec.mode
         else:
-            mode = ''.join(['B', rec['mode']['data']])
+            mode = ''.join(['B', rec.mode])
 
-        scores['mults'].setdefault(mode, {
-            'dxcc': {'data': [], 'errors': [], },
-            'state': [],
-        })
-        try:
-            if rec['dxcc']['data'] not in scores['mults'][mode]['dxcc']['data']:
-                scores['mults'][mode]['dxcc']['data'].append(rec['dxcc']['data'])
-        except KeyError:
-            scores['mults'][mode]['dxcc']['errors'].append(rec)
-        try:
-            # For now, assuming only US and Canada for states
-            if rec['state']['data'].upper() not in scores['mults'][mode]['state'] and \
-                    int(rec['dxcc']['data']) in [1, 6, 110, 291]:
-                scores['mults'][mode]['state'].append(rec['state']['data'].upper())
-        except:
-            pass
+        if mode not in tallies:
+            tallies[mode] = (MultiplierTally(), MultiplierTally())
+            dxcc, state = dxcc_state_mults(*tallies[mode])
+            scores['mults'][mode] = {'dxcc': dxcc, 'state': state}
+        count_dxcc_state(rec, *tallies[mode])
 
     for modedict in scores['mults']:
         scores['dxccmult'] += len(scores['mults'][modedict]['dxcc']['data'])
@@ -1567,21 +1652,19 @@ def calc_scores_31flavors(valid_records):
 
 
 def calc_scores_tdw(valid_records, bonus_stations):
+    members_worked = MultiplierTally()
     scores = {
         'total': 0,
         'q-points': len(valid_records),
         'bonus': 0,
-        'members': [],
+        'members': members_worked.data,
     }
     for rec in valid_records:
         #
-        try:
-            if rec['call']['data'].upper() in bonus_stations:
-                scores['bonus'] += 100
-        except KeyError:
-            pass
-        if rec['member_number'] not in scores['members'] and rec['member_number'] is not None:
-            scores['members'].append(rec['member_number'])
+        if rec.call is not None and rec.call.upper() in bonus_stations:
+            scores['bonus'] += 100
+        if rec.member_number is not None:
+            members_worked.add(rec.member_number, rec)
 
     scores['total'] = scores['q-points'] * len(scores['members']) + scores['bonus']
     return scores
@@ -1606,29 +1689,16 @@ def calc_scores_tp_dh(valid_records):
     scores = {}
     scores['q-points'] = {'40m': [], '80m': [], '160m': []}
     scores['mults'] = {}
-    scores['mults']['dxcc'] = {}
-    scores['mults']['dxcc']['data'] = []
-    scores['mults']['dxcc']['errors'] = []
-    scores['mults']['state'] = []
+    dxcc, state = MultiplierTally(), MultiplierTally()
+    scores['mults']['dxcc'], scores['mults']['state'] = dxcc_state_mults(dxcc, state)
     scores['mults']['band'] = []
     for rec in valid_records:
-        try:
-            if rec['dxcc']['data'] not in scores['mults']['dxcc']['data']:
-                scores['mults']['dxcc']['data'].append(rec['dxcc']['data'])
-        except:
-            scores['mults']['dxcc']['errors'].append(rec)
-        try:
-            # For now, assuming only US and Canada for states
-            if rec['state']['data'].upper() not in scores['mults']['state'] and \
-                    int(rec['dxcc']['data']) in [1, 6, 110, 291]:
-                scores['mults']['state'].append(rec['state']['data'].upper())
-        except:
-            pass
-        if rec['band']['data'].lower() == '40m':
+        count_dxcc_state(rec, dxcc, state)
+        if rec.band.lower() == '40m':
             scores['q-points']['40m'].append(rec)
-        elif rec['band']['data'].lower() == '80m':
+        elif rec.band.lower() == '80m':
             scores['q-points']['80m'].append(rec)
-        elif rec['band']['data'].lower() == '160m':
+        elif rec.band.lower() == '160m':
             scores['q-points']['160m'].append(rec)
 
     q_totals = len(scores['q-points']['40m']) + (2 * len(scores['q-points']['80m'])) + (
@@ -1641,7 +1711,7 @@ def calc_scores_tp_dh(valid_records):
     return scores
 
 
-def test_record(entry, conditions, summary, valid_records):
+def test_record(entry, conditions, summary, valid_records, dupe_index=None):
     # Walk through each adif entry and validate against a bunch of stuff
     # TODO: Add a test for valid member information (ie, during TDW, check the SRX_STRING of the
     #       member number against the callsign of the QSO to see if it matches)  Use that instead
@@ -1658,27 +1728,49 @@ def test_record(entry, conditions, summary, valid_records):
     if rec_is_psk(entry, conditions['valid_modes'], summary):
         errors.remove('is_not_psk')
 
-    if rec_is_not_dupe(entry, valid_records):
+    fields = conditions.get('dupe_fields', dupe_fields)
+    if rec_is_not_dupe(entry, valid_records, dupe_index, fields):
         errors.remove('is_dupe')
 
     if len(errors) == 0:
+        # the caller is about to add entry to valid_records, keep the index in step
+        if dupe_index is not None:
+            dupe_index.add(dupe_key(entry, fields))
         return True, None
     else:
         return False, errors
 
 
-def rec_is_not_dupe(entry, valid_entries):
+def dupe_key(entry, fields=dupe_fields):
+    """
+        lower cased tuple of the dupe fields, or None if the record is missing
+        one.  Calls go by callsign.station(), so W9SMR and W9SMR/9 are dupes
+    """
+    key = []
+    for field in fields:
+        data = entry.value(field)
+        if data is None:
+            return None
+        if field == 'call':
+            data = callsign.station(data)
+        key.append(data.lower())
+    return tuple(key)
+
+
+def rec_is_not_dupe(entry, valid_entries, dupe_index=None, fields=dupe_fields):
     # check to see if the same combo already exists in valid_entries
+    # dupe_index is the set of dupe_key()s of valid_entries; callers checking a
+    # whole log should keep one (see run_contest()), without it this is a scan
     if len(valid_entries) != 0:
-        try:
-            check_value = entry['call']['data'] + entry['band']['data'] + entry['mode']['data']
-        except:
+        check_value = dupe_key(entry, fields)
+        if check_value is None:
             return False
-        for record in valid_entries:
-            dupe_check = record['call']['data'] + record['band']['data'] + record['mode']['data']
-            if check_value.lower() == dupe_check.lower():
-                return False
-        return True
+        if dupe_index is None:
+            for record in valid_entries:
+                if dupe_key(record, fields) == check_value:
+                    return False
+            return True
+        return check_value not in dupe_index
     else:
         return True
 
@@ -1688,7 +1780,7 @@ def rec_in_bands(entry, valid_bands, summary):
     # dates and times
 
     try:
-        if entry['band']['data'].lower() in valid_bands:
+        if entry.band.lower() in valid_bands:
             return True
         else:
             return False
@@ -1696,62 +1788,130 @@ def rec_in_bands(entry, valid_bands, summary):
         return False
 
 
-def rec_in_window(entry, conditions, summary):
-    """take the adif record and compare against valid dates and times """
-    # TODO Need to generalize for multi-windows (eg, TDW)
-    # TODO Need to standardize on form field names
+def timestamp(dt):
+    """ datetime as integer seconds (days since 0001-01-01 * 86400 + seconds into the day)"""
+    return dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+# QSO_DATE -> timestamp of its midnight; logs only cover a few days
+qso_days = {}
+
+
+def qso_day(qso_date):
+    """ timestamp() of a YYYYMMDD QSO_DATE's midnight, -1 for anything else"""
+    day = qso_days.get(qso_date)
+    if day is None:
+        day = -1
+        if len(qso_date) == 8 and qso_date.isdigit():
+            try:
+                day = datetime.date(int(qso_date[0:4]), int(qso_date[4:6]), int(qso_date[6:8])).toordinal() * 86400
+            except ValueError:
+                pass
+        qso_days[qso_date] = day
+    return day
 
-    qso_start_string = entry['qso_date']['data'] + entry['time_on']['data']
-    if entry['time_on']['length'] == 6:
+
+def time_seconds(time_on):
+    """ seconds into the day of an HHMM or HHMMSS TIME_ON, -1 for anything else"""
+    if (len(time_on) == 4 or len(time_on) == 6) and time_on.isdigit():
+        hour = int(time_on[0:2])
+        minute = int(time_on[2:4])
+        second = int(time_on[4:6] or 0)
+        if hour < 24 and minute < 60 and second < 60:
+            return hour * 3600 + minute * 60 + second
+    return -1
+
+
+def qso_timestamp(qso_date, time_on):
+    """
+        timestamp() of a QSO's QSO_DATE and TIME_ON.  The usual YYYYMMDD with
+        HHMM or HHMMSS is sliced up as integers; anything else goes through
+        strptime the way it always has (eg, 930 for 09:30)
+    """
+    seconds = time_seconds(time_on)
+    if seconds >= 0:
+        day = qso_day(qso_date)
+        if day >= 0:
+            return day + seconds
+    qso_start_string = qso_date + time_on
+    if len(time_on) == 6:
         qso_dt = datetime.datetime.strptime(qso_start_string, '%Y%m%d%H%M%S')
     else:
         qso_dt = datetime.datetime.strptime(qso_start_string, '%Y%m%d%H%M')
+    return timestamp(qso_dt)
 
-    if conditions['contest_start'] <= qso_dt <= conditions['contest_end']:
-        if summary['contest_name'] in ['tripleplay', 'doubleheader']:
-            if summary['saturday_start_time'] != 'None':
-                if conditions['saturday_block_start_dt'] <= qso_dt <= conditions['saturday_block_end_dt']:
-                    return True
-            if summary['sunday_start_time'] != 'None':
-                if conditions['sunday_block_start_dt'] <= qso_dt <= conditions['sunday_block_end_dt']:
-                    return True
-            if summary['monday_start_time'] != 'None':
-                if conditions['monday_block_start_dt'] <= qso_dt <= conditions['monday_block_end_dt']:
-                    return True
-            return False
+
+def get_block_windows(conditions, summary):
+    """
+        The operating windows for an entrant as a list of inclusive
+        (start, end) timestamp() ranges, already cut down to the contest
+        period
+    """
+    contest_start = timestamp(conditions['contest_start'])
+    contest_end = timestamp(conditions['contest_end'])
+    if summary['contest_name'] in ['tripleplay', 'doubleheader']:
+        blocks = []
+        for day in ['saturday', 'sunday', 'monday']:
+            if summary[day + '_start_time'] != 'None':
+                blocks.append((timestamp(conditions[day + '_block_start_dt']),
+                               timestamp(conditions[day + '_block_end_dt'])))
+    else:
+        try:
+            block_start = int(summary['block_start_time'])
+        except KeyError:
+            # TODO: Does it make sense to allow the whole contest if we can't find a start time?
+            blocks = [(contest_start, contest_end)]
         else:
-            try:
-                block_start = int(summary['block_start_time'])
-            except KeyError:
-                # TODO: Does it make sense to return True if we can't find a start time?
-                return True
-            else:
-                if summary['contest_name'] in ['thirtyone', '31flavors']:
-                    if 1000 <= block_start <= 2359:
-                        block_start_string = conditions['contest_start'].strftime('%Y%m%d') + '{:0>4}'.format(
-                            summary['block_start_time'])
-                    else:
-                        day2 = conditions['contest_start'] + datetime.timedelta(days=1)
-                        block_start_string = day2.strftime('%Y%m%d') + '{:0>4}'.format(summary['block_start_time'])
-                elif summary['contest_name'] in ['firecracker', 'jayhudak', 'greatpumpkin']:
-                    if 2000 <= block_start <= 2359:
-                        block_start_string = conditions['contest_start'].strftime('%Y%m%d') + '{:0>4}'.format(
-                            summary['block_start_time'])
-                    else:
-                        day2 = conditions['contest_start'] + datetime.timedelta(days=1)
-                        block_start_string = day2.strftime('%Y%m%d') + '{:0>4}'.format(summary['block_start_time'])
+            if summary['contest_name'] in ['thirtyone', '31flavors']:
+                if 1000 <= block_start <= 2359:
+                    block_start_string = conditions['contest_start'].strftime('%Y%m%d') + '{:0>4}'.format(
+                        summary['block_start_time'])
                 else:
+                    day2 = conditions['contest_start'] + datetime.timedelta(days=1)
+                    block_start_string = day2.strftime('%Y%m%d') + '{:0>4}'.format(summary['block_start_time'])
+            elif summary['contest_name'] in ['firecracker', 'jayhudak', 'greatpumpkin']:
+                if 2000 <= block_start <= 2359:
                     block_start_string = conditions['contest_start'].strftime('%Y%m%d') + '{:0>4}'.format(
                         summary['block_start_time'])
-                block_start_dt = datetime.datetime.strptime(block_start_string, '%Y%m%d%H%M')
-                block_end_dt = block_start_dt + datetime.timedelta(hours=6)
-                if block_end_dt > conditions['contest_end']:
-                    block_end_dt = conditions['contest_end']
-
-                if block_start_dt <= qso_dt < block_end_dt:
-                    return True
                 else:
-                    return False
+                    day2 = conditions['contest_start'] + datetime.timedelta(days=1)
+                    block_start_string = day2.strftime('%Y%m%d') + '{:0>4}'.format(summary['block_start_time'])
+            else:
+                block_start_string = conditions['contest_start'].strftime('%Y%m%d') + '{:0>4}'.format(
+                    summary['block_start_time'])
+            block_start_dt = datetime.datetime.strptime(block_start_string, '%Y%m%d%H%M')
+            block_end_dt = block_start_dt + datetime.timedelta(hours=6)
+            if block_end_dt > conditions['contest_end']:
+                block_end_dt = conditions['contest_end']
+            # the 6 hours run up to, but not including, block_end_dt
+            blocks = [(timestamp(block_start_dt), timestamp(block_end_dt) - 1)]
+    return [(max(start, contest_start), min(end, contest_end)) for start, end in blocks]
+
+
+def rec_in_window(entry, conditions, summary):
+    """take the adif record and compare against valid dates and times """
+    # TODO Need to generalize for multi-windows (eg, TDW)
+    # TODO Need to standardize on form field names
+
+    qso_ts = qso_timestamp(entry.qso_date, entry.time_on)
+
+    # worked out once per entrant; the blocks only once a QSO is inside the contest
+    windows = conditions.get('qso_windows')
+    if windows is None or windows['summary'] is not summary:
+        windows = {
+            'summary': summary,
+            'contest': (timestamp(conditions['contest_start']), timestamp(conditions['contest_end'])),
+            'blocks': None,
+        }
+        conditions['qso_windows'] = windows
+
+    if windows['contest'][0] <= qso_ts <= windows['contest'][1]:
+        if windows['blocks'] is None:
+            windows['blocks'] = get_block_windows(conditions, summary)
+        for block_start, block_end in windows['blocks']:
+            if block_start <= qso_ts <= block_end:
+                return True
+        return False
     else:
         return False
 
@@ -1760,131 +1920,51 @@ def rec_is_psk(entry, valid_modes, summary):
     # take the adif record and compare against valid
     # operating modes (ie, PSK)
 
-    try:
-        if entry['mode']['data'].lower() in valid_modes:
-            return True
-        else:
-            return False
-    except KeyError:
+    if entry.mode is not None and entry.mode.lower() in valid_modes:
+        return True
+    else:
         return False
 
 
+def get_srx_string(rec):
+    ''' first exchange-ish field the record has, in the order loggers tend to put it'''
+    for field in exchange_display_fields:
+        srx_string = rec.value(field)
+        if srx_string is not None:
+            return srx_string
+    return ''
+
+
 def print_entries(entries, valid=True):
     if valid:
         print('\nValid QSOs')
         print_header(valid=True)
         for rec in entries:
-            try:
-                call = rec['call']['data'].upper()
-            except KeyError:
-                call = ''
-            try:
-                qso_date = rec['qso_date']['data']
-            except KeyError:
-                qso_date = ''
-            try:
-                time_on = rec['time_on']['data']
-            except KeyError:
-                time_on = ''
-            try:
-                band = rec['band']['data']
-            except KeyError:
-                band = ''
-            try:
-                srx_string = rec['srx_string']['data']
-            except KeyError:
-                try:
-                    srx_string = rec['srx']['data']
-                except KeyError:
-                    try:
-                        srx_string = rec['rst_rcvd']['data']
-                    except KeyError:
-                        try:
-                            srx_string = rec['comment']['data']
-                        except KeyError:
-                            try:
-                                srx_string = rec['notes']['data']
-                            except KeyError:
-                                try:
-                                    srx_string = rec['app_n1mm_misctext']['data']
-                                except KeyError:
-                                    try:
-                                        srx_string = rec['name']['data']
-                                    except KeyError:
-                                        try:
-                                            srx_string = rec['other']['data']
-                                        except KeyError:
-                                            try:
-                                                srx_string = rec['award']['data']
-                                            except KeyError:
-                                                srx_string = ''
-            try:
-                dxcc = rec['dxcc']['data']
-            except KeyError:
-                dxcc = ''
-            try:
-                state = rec['state']['data'].upper()
-            except KeyError:
-                state = ''
-            try:
-                print("{},{},{},{},{},{},{}".format(
-                    call,
-                    qso_date,
-                    time_on,
-                    band,
-                    srx_string,
-                    dxcc,
-                    state,
-                )
-                )
-            except KeyError:
-                print("KeyError for record", file=sys.stderr)
+            print("{},{},{},{},{},{},{}".format(
+                (rec.call or '').upper(),
+                rec.qso_date or '',
+                rec.time_on or '',
+                rec.band or '',
+                get_srx_string(rec),
+                rec.dxcc or '',
+                (rec.state or '').upper(),
+            )
+            )
     else:
         print('\nBroken QSOs (check listed errors)')
         print_header(valid=False)
         for rec in entries:
-            try:
-                call = rec['data']['call']['data']
-            except KeyError:
-                call = ''
-            try:
-                qso_date = rec['data']['qso_date']['data']
-            except KeyError:
-                qso_date = ''
-            try:
-                time_on = rec['data']['time_on']['data']
-            except KeyError:
-                time_on = ''
-            try:
-                band = rec['data']['band']['data']
-            except KeyError:
-                band = ''
-            try:
-                srx_string = rec['data']['srx_string']['data']
-            except KeyError:
-                srx_string = ''
-            try:
-                dxcc = rec['data']['dxcc']['data']
-            except KeyError:
-                dxcc = ''
-            try:
-                state = rec['data']['state']['data']
-            except KeyError:
-                state = ''
-            try:
-                print("{},{},{},{},{},{},{},{}".format(
-                    call,
-                    qso_date,
-                    time_on,
-                    band,
-                    srx_string,
-                    dxcc,
-                    state,
-                    '|'.join(rec['errors']),
-                )
-                )
-            except KeyError:
-                print("KeyError for record", file=sys.stderr)
+            print("{},{},{},{},{},{},{},{}".format(
+                rec['data'].call or '',
+                rec['data'].qso_date or '',
+                rec['data'].time_on or '',
+                rec['data'].band or '',
+                rec['data'].srx_string or '',
+                rec['data'].dxcc or '',
+                rec['data'].state or '',
+                '|'.join(rec['errors']),
+            )
+            )
 
 
 def print_entries_31flavors(entries, valid=True):
@@ -1892,127 +1972,33 @@ def print_entries_31flavors(entries, valid=True):
         print('\nValid QSOs')
         print_header_31flavors(valid=True)
         for rec in entries:
-            try:
-                call = rec['call']['data'].upper()
-            except:
-                call = ''
-            try:
-                qso_date = rec['qso_date']['data']
-            except:
-                qso_date = ''
-            try:
-                time_on = rec['time_on']['data']
-            except:
-                time_on = ''
-            try:
-                band = rec['band']['data']
-            except:
-                band = ''
-            try:
-                mode = rec['mode']['data']
-            except:
-                mode = ''
-            try:
-                srx_string = rec['srx_string']['data']
-            except:
-                try:
-                    srx_string = rec['srx']['data']
-                except:
-                    try:
-                        srx_string = rec['rst_rcvd']['data']
-                    except:
-                        try:
-                            srx_string = rec['comment']['data']
-                        except:
-                            try:
-                                srx_string = rec['notes']['data']
-                            except:
-                                try:
-                                    srx_string = rec['app_n1mm_misctext']['data']
-                                except:
-                                    try:
-                                        srx_string = rec['name']['data']
-                                    except:
-                                        try:
-                                            srx_string = rec['other']['data']
-                                        except:
-                                            try:
-                                                srx_string = rec['award']['data']
-                                            except:
-                                                srx_string = ''
-            try:
-                dxcc = rec['dxcc']['data']
-            except:
-                dxcc = ''
-            try:
-                state = rec['state']['data'].upper()
-            except:
-                state = ''
-            try:
-                print("{},{},{},{},{},{},{},{}".format(
-                    call,
-                    qso_date,
-                    time_on,
-                    band,
-                    mode,
-                    srx_string,
-                    dxcc,
-                    state,
-                )
-                )
-            except KeyError:
-                print("KeyError for record", file=sys.stderr)
+            print("{},{},{},{},{},{},{},{}".format(
+                (rec.call or '').upper(),
+                rec.qso_date or '',
+                rec.time_on or '',
+                rec.band or '',
+                rec.mode or '',
+                get_srx_string(rec),
+                rec.dxcc or '',
+                (rec.state or '').upper(),
+            )
+            )
     else:
         print('\nBroken QSOs (check listed errors)')
         print_header_31flavors(valid=False)
         for rec in entries:
-            try:
-                call = rec['data']['call']['data']
-            except:
-                call = ''
-            try:
-                qso_date = rec['data']['qso_date']['data']
-            except:
-                qso_date = ''
-            try:
-                time_on = rec['data']['time_on']['data']
-            except:
-                time_on = ''
-            try:
-                band = rec['data']['band']['data']
-            except:
-                band = ''
-            try:
-                mode = rec['data']['mode']['data']
-            except:
-                mode = ''
-            try:
-                srx_string = rec['data']['srx_string']['data']
-            except:
-                srx_string = ''
-            try:
-                dxcc = rec['data']['dxcc']['data']
-            except:
-                dxcc = ''
-            try:
-                state = rec['data']['state']['data']
-            except:
-                state = ''
-            try:
-                print("{},{},{},{},{},{},{},{},{}".format(
-                    call,
-                    qso_date,
-                    time_on,
-                    band,
-                    mode,
-                    srx_string,
-                    dxcc,
-                    state,
-                    '|'.join(rec['errors']),
-                )
-                )
-            except KeyError:
-                print("KeyError for record", file=sys.stderr)
+            print("{},{},{},{},{},{},{},{},{}".format(
+                rec['data'].call or '',
+                rec['data'].qso_date or '',
+                rec['data'].time_on or '',
+                rec['data'].band or '',
+                rec['data'].mode or '',
+                rec['data'].srx_string or '',
+                rec['data'].dxcc or '',
+                rec['data'].state or '',
+                '|'.join(rec['errors']),
+            )
+            )
 
 
 def print_entries_tdw(entries, bonus_stations, valid=True):
@@ -2020,91 +2006,35 @@ def print_entries_tdw(entries, bonus_stations, valid=True):
         print('\nValid QSOs')
         print_header_tdw(valid=True)
         for rec in entries:
-            try:
-                call = rec['call']['data'].upper()
-            except:
-                call = ''
-            try:
-                qso_date = rec['qso_date']['data']
-            except:
-                qso_date = ''
-            try:
-                time_on = rec['time_on']['data']
-            except:
-                time_on = ''
-            try:
-                band = rec['band']['data']
-            except:
-                band = ''
-            try:
-                mode = rec['mode']['data']
-            except:
-                mode = ''
-            try:
-                member = rec['member_number']
-            except:
-                member = ''
-            try:
-                if rec['call']['data'].upper() in bonus_stations:
-                    bonus = 'Bonus'
-                else:
-                    bonus = ''
-            except:
+            call = (rec.call or '').upper()
+            if call and call in bonus_stations:
+                bonus = 'Bonus'
+            else:
                 bonus = ''
-            try:
-                print("{},{},{},{},{},{},{}".format(
-                    call,
-                    qso_date,
-                    time_on,
-                    band,
-                    mode,
-                    member,
-                    bonus,
-                )
-                )
-            except KeyError:
-                print("KeyError for record", file=sys.stderr)
+            print("{},{},{},{},{},{},{}".format(
+                call,
+                rec.qso_date or '',
+                rec.time_on or '',
+                rec.band or '',
+                rec.mode or '',
+                rec.member_number,
+                bonus,
+            )
+            )
     else:
         print('\nBroken QSOs (check listed errors)')
         print_header_tdw(valid=False)
         for rec in entries:
-            try:
-                call = rec['data']['call']['data']
-            except:
-                call = ''
-            try:
-                qso_date = rec['data']['qso_date']['data']
-            except:
-                qso_date = ''
-            try:
-                time_on = rec['data']['time_on']['data']
-            except:
-                time_on = ''
-            try:
-                band = rec['data']['band']['data']
-            except:
-                band = ''
-            try:
-                mode = rec['data']['mode']['data']
-            except:
-                mode = ''
-            try:
-                member = rec['data']['member_number']
-            except:
-                member = ''
-            try:
-                print("{},{},{},{},{},{},{}".format(
-                    call,
-                    qso_date,
-                    time_on,
-                    band,
-                    mode,
-                    member,
-                    '|'.join(rec['errors']),
-                )
-                )
-            except KeyError:
-                print("KeyError for record", file=sys.stderr)
+            print("{},{},{},{},{},{},{}".format(
+                rec['data'].call or '',
+                rec['data'].qso_date or '',
+                rec['data'].time_on or '',
+                rec['data'].band or '',
+                rec['data'].mode or '',
+                rec['data'].member_number,
+                '|'.join(rec['errors']),
+            )
+            )
 
 
 def print_score(scores, summary, args):
@@ -2241,14 +2171,19 @@ def print_score(scores, summary, args):
         if scores['mults']['dxcc']['errors']:
             for error in scores['mults']['dxcc']['errors']:
                 print('DXCC ERRORS: {},{},{}'.format(
-                    error['call']['data'],
-                    error['qso_date']['data'],
-                    error['time_on']['data'],
+                    error.call,
+                    error.qso_date,
+                    error.time_on,
                 )
                 )
 
 
-def print_score_31flavors(scores, summary):
+def print_score_31flavors(scores, summary, args=None):
+    # CSV line if args.score_only, or (without args) if there is a summary
+    if args is not None:
+        score_only = args.score_only
+    else:
+        score_only = summary is not None
     try:
         callsign = summary['callsign']
     except:
@@ -2270,7 +2205,7 @@ def print_score_31flavors(scores, summary):
     dxcc = 0
     state = 0
 
-    if summary is not None:  # Report only, spit out CSV of call+score
+    if score_only:  # Report only, spit out CSV of call+score
         for mode in scores['mults']:
             dxcc += len(scores['mults'][mode]['dxcc']['data'])
             state += len(scores['mults'][mode]['state'])
@@ -2307,14 +2242,19 @@ def print_score_31flavors(scores, summary):
             if scores['mults'][mode]['dxcc']['errors']:
                 for error in scores['mults'][mode]['dxcc']['errors']:
                     print('DXCC ERRORS: {},{},{}'.format(
-                        error['call']['data'],
-                        error['qso_date']['data'],
-                        error['time_on']['data'],
+                        error.call,
+                        error.qso_date,
+                        error.time_on,
                     )
                     )
 
 
-def print_score_tdw(scores, summary):
+def print_score_tdw(scores, summary, args=None):
+    # CSV line if args.score_only, or (without args) if there is a summary
+    if args is not None:
+        score_only = args.score_only
+    else:
+        score_only = summary is not None
     try:
         callsign = summary['callsign']
     except:
@@ -2336,7 +2276,7 @@ def print_score_tdw(scores, summary):
     bonus = scores['bonus']
     total = scores['total']
 
-    if summary is not None:  # Report only, spit out CSV of call+score
+    if score_only:  # Report only, spit out CSV of call+score
         print('callsign,category,070-number,email,q-points,members,bonus,total')
         print('{},{},{},{},{},{},{},{}'.format(
             callsign,
@@ -2359,7 +2299,12 @@ def print_score_tdw(scores, summary):
         )
 
 
-def print_score_tp_dh(scores, summary):
+def print_score_tp_dh(scores, summary, args=None):
+    # CSV line if args.score_only, or (without args) if there is a summary
+    if args is not None:
+        score_only = args.score_only
+    else:
+        score_only = summary is not None
     try:
         callsign = summary['callsign']
     except:
@@ -2381,7 +2326,7 @@ def print_score_tp_dh(scores, summary):
     q_points_160 = len(scores['q-points']['160m'])
     total = scores['total']
 
-    if summary is not None:  # Report only, spit out CSV of call+score
+    if score_only:  # Report only, spit out CSV of call+score
         print('callsign,category,070-number,email,40mQ,80mQ,160mQ,dxcc-mult,state-mult,total')
         print('{},{},{},{},{},{},{},{},{},{}'.format(
             callsign,
@@ -2409,9 +2354,9 @@ def print_score_tp_dh(scores, summary):
         if scores['mults']['dxcc']['errors']:
             for error in scores['mults']['dxcc']['errors']:
                 print('DXCC ERRORS: {},{},{}'.format(
-                    error['call']['data'],
-                    error['qso_date']['data'],
-                    error['time_on']['data'],
+                    error.call,
+                    error.qso_date,
+                    error.time_on,
                 )
                 )
 
@@ -2530,6 +2475,49 @@ def print_title_block_tdw(summary):
     )
 
 
+def contest_spec(scorer, print_score, print_title_block, print_entries=print_entries, scorer_args=(),
+                 print_entries_args=(), prepare=None, enrichers=(), year_conditions=None):
+    """
+        Everything about a contest that isn't in its (per year) conditions.
+        scorer(valid_records, *conditions[scorer_args]) gives the scores,
+        prepare(summary, conditions) sets up per entrant conditions,
+        enrichers(record, conditions) fill in extra QSO data before it's
+        validated, year_conditions(year, conditions) adds per year extras.
+        The print_* functions are what the contest script reports with.
+    """
+    return {
+        'scorer': scorer,
+        'scorer_args': list(scorer_args),
+        'prepare': prepare,
+        'enrichers': list(enrichers),
+        'year_conditions': year_conditions,
+        'print_score': print_score,
+        'print_title_block': print_title_block,
+        'print_entries': print_entries,
+        'print_entries_args': list(print_entries_args),
+    }
+
+
+# The contests, by their set_conditions() name
+contest_specs = {
+    'pskfest': contest_spec(calc_scores, print_score, print_title_block),
+    'vdsprint': contest_spec(calc_vd_scores, print_score, print_title_block),
+    'saintpat': contest_spec(calc_scores_saintpat, print_score, print_title_block),
+    'thirtyone': contest_spec(calc_scores_31flavors, print_score_31flavors, print_title_block_startblock,
+                              print_entries=print_entries_31flavors),
+    'tdw': contest_spec(calc_scores_tdw, print_score_tdw, print_title_block_tdw, print_entries=print_entries_tdw,
+                        scorer_args=['bonus_stations'], print_entries_args=['bonus_stations'],
+                        enrichers=[set_member_number], year_conditions=tdw_set_member_conditions),
+    'firecracker': contest_spec(calc_scores, print_score, print_title_block_startblock),
+    'jayhudak': contest_spec(calc_scores, print_score, print_title_block_startblock),
+    'greatpumpkin': contest_spec(calc_scores, print_score, print_title_block_startblock),
+    'tripleplay': contest_spec(calc_scores_tp_dh, print_score_tp_dh, print_title_block_multiple_startblocks,
+                               prepare=tp_dh_build_date_blocks),
+    'doubleheader': contest_spec(calc_scores_tp_dh, print_score_tp_dh, print_title_block_multiple_startblocks,
+                                 prepare=tp_dh_build_date_blocks),
+}
+
+
 if __name__ == '__main__':
     import argparse
 
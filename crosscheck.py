@@ -0,0 +1,196 @@
+#!/usr/local/bin/python3
+#
+# crosscheck.py
+#
+# confirm every entrant's QSOs against the other stations' logs
+#
+# usage: crosscheck.py --summary SUMMARY [--contest CONTEST] [--year YEAR] [--minutes N] [--verbose]
+#
+# Each log is scored on its own first (score_all.py, so the usual band,
+# mode, window and dupe checks apply and the result cache is used), then the
+# valid QSOs of the whole field are put in one index keyed by (logging
+# station, worked station, band, mode) with a time-sorted list per key.  A
+# QSO is confirmed when the worked station's list for the reverse key has a
+# QSO within --minutes of it; each QSO confirms at most one other.  Sorting
+# the lists is the only step that isn't linear in the number of QSOs.
+#
+# What's left unconfirmed is flagged:
+#   busted:     someone with a call one character off the logged call has
+#               an unconfirmed QSO with this station at the same time, band
+#               and mode (the logged call was probably miscopied)
+#   not_in_log: the worked station sent in a log, but this QSO isn't in it
+#   unique:     the worked station sent no log and nobody else worked it
+#   no_log:     the worked station sent no log, but others worked it too
+
+import sys
+import bisect
+import argparse
+import collections
+import contests
+import callsign
+import score_all
+
+# modes that are the same thing on the air, whatever the logger called them
+mode_aliases = {'psk': 'psk31', 'bpsk': 'psk31', 'bpsk31': 'psk31'}
+
+statuses = ['confirmed', 'busted', 'not_in_log', 'unique', 'no_log']
+
+
+def qso_key(rec):
+    """ (worked station, band, mode, timestamp) for a valid QSO, None if it has no call"""
+    if rec.call is None:
+        return None
+    mode = rec.mode.lower()
+    return (callsign.station(rec.call), rec.band.lower(), mode_aliases.get(mode, mode),
+            contests.qso_timestamp(rec.qso_date, rec.time_on))
+
+
+def one_edit(a, b):
+    """ True if a and b differ by one substituted, added or dropped character"""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        return sum(x != y for x, y in zip(a, b)) == 1
+    if len(a) > len(b):
+        a, b = b, a
+    for i in range(len(a)):
+        if a[i] != b[i]:
+            return a[i:] == b[i + 1:]
+    return True
+
+
+def match_times(ours, theirs, tolerance):
+    """
+        Pair up two time-sorted lists of (timestamp, index), each entry at most
+        once, where the times are within tolerance seconds.  Greedy from the
+        earliest, which pairs up as many as can be paired
+    """
+    pairs = []
+    i = j = 0
+    while i < len(ours) and j < len(theirs):
+        if abs(ours[i][0] - theirs[j][0]) <= tolerance:
+            pairs.append((ours[i][1], theirs[j][1]))
+            i += 1
+            j += 1
+        elif ours[i][0] < theirs[j][0]:
+            i += 1
+        else:
+            j += 1
+    return pairs
+
+
+def crosscheck(logs, minutes=5):
+    """
+        logs is a dict of entrant call: valid records.  Returns a dict of
+        entrant call: a list with a {'data': record, 'status': ..., 'match':
+        ...} per record, in the log's order.  match is the station whose log
+        confirmed the QSO, or the likely right call for a busted one
+    """
+    tolerance = minutes * 60
+    owners = {}
+    results = {}
+    index = collections.defaultdict(list)
+    worked_by = collections.defaultdict(set)
+    for entrant, records in logs.items():
+        owner = callsign.station(entrant)
+        owners[entrant] = owner
+        results[entrant] = []
+        for i, rec in enumerate(records):
+            key = qso_key(rec)
+            # nobody can confirm a QSO without a call
+            results[entrant].append({'data': rec, 'status': 'unique' if key is None else None, 'match': None})
+            if key is None:
+                continue
+            worked, band, mode, ts = key
+            index[(owner, worked, band, mode)].append((ts, (entrant, i)))
+            worked_by[worked].add(owner)
+    submitted = set(owners.values())
+
+    for key in index:
+        index[key].sort()
+    for (owner, worked, band, mode), ours in index.items():
+        # each pair of logs once, from the side that sorts first
+        if owner >= worked:
+            continue
+        theirs = index.get((worked, owner, band, mode))
+        if theirs is None:
+            continue
+        for (entrant, i), (other, j) in match_times(ours, theirs, tolerance):
+            results[entrant][i].update(status='confirmed', match=owners[other])
+            results[other][j].update(status='confirmed', match=owners[entrant])
+
+    # what's left unconfirmed, by who it was worked with
+    unconfirmed = collections.defaultdict(list)
+    for (owner, worked, band, mode), qsos in index.items():
+        for ts, (entrant, i) in qsos:
+            if results[entrant][i]['status'] is None:
+                unconfirmed[(worked, band, mode)].append((ts, owner))
+    for key in unconfirmed:
+        unconfirmed[key].sort()
+
+    for (owner, worked, band, mode), qsos in index.items():
+        for ts, (entrant, i) in qsos:
+            result = results[entrant][i]
+            if result['status'] is not None:
+                continue
+            # anyone one character off the logged call who logged us, unconfirmed, at the same time?
+            others = unconfirmed.get((owner, band, mode), [])
+            start = bisect.bisect_left(others, (ts - tolerance,))
+            for other_ts, other in others[start:]:
+                if other_ts > ts + tolerance:
+                    break
+                if other != worked and one_edit(other, worked):
+                    result.update(status='busted', match=other)
+                    break
+            if result['status'] is None:
+                if worked in submitted:
+                    result['status'] = 'not_in_log'
+                elif len(worked_by[worked]) == 1:
+                    result['status'] = 'unique'
+                else:
+                    result['status'] = 'no_log'
+    return results
+
+
+def print_crosscheck(results, verbose=False, outputfile=sys.stdout):
+    """ a CSV line of status counts per entrant; verbose adds every QSO that wasn't confirmed"""
+    print(','.join(['callsign', 'qsos'] + statuses), file=outputfile)
+    for entrant in results:
+        counts = collections.Counter(result['status'] for result in results[entrant])
+        print(','.join([entrant, str(len(results[entrant]))] + [str(counts[status]) for status in statuses]),
+              file=outputfile)
+    if verbose:
+        print(file=outputfile)
+        print('callsign,call,qso_date,time_on,band,mode,status,match', file=outputfile)
+        for entrant in results:
+            for result in results[entrant]:
+                if result['status'] == 'confirmed':
+                    continue
+                rec = result['data']
+                print(','.join([entrant, rec.call or '', rec.qso_date, rec.time_on, rec.band, rec.mode,
+                                result['status'], result['match'] or '']), file=outputfile)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cross-check every entrant\'s QSOs against the other logs')
+    parser.add_argument('--summary', metavar='SUMMARY', required=True)
+    parser.add_argument('--delim', metavar='DELIMITER', default=',')
+    parser.add_argument('--contest', metavar='CONTEST', choices=list(contests.contest_specs),
+                        help='Contest for every entrant (default: the contest_name column)')
+    parser.add_argument('--year', metavar='YEAR', type=int, help='Year for every entrant (default: the year column)')
+    parser.add_argument('--minutes', metavar='N', type=int, default=5,
+                        help='How far apart the two logs\' times can be (default: %(default)s)')
+    parser.add_argument('--jobs', metavar='N', type=int, default=1, help='Score entrants in N processes')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Score every log even if the result cache has it')
+    parser.add_argument('--verbose', action='store_true', help='List every QSO that wasn\'t confirmed')
+    args = parser.parse_args()
+
+    summary = contests.summary_parser(args.summary, args.delim)
+    logs = {}
+    for result in score_all.score_all(summary, args.contest, args.year, args.jobs, args.use_cache):
+        if result['error'] is not None:
+            print('{}: not checked: {}'.format(result['callsign'], result['error']), file=sys.stderr)
+            continue
+        logs[result['callsign']] = result['valid']
+    print_crosscheck(crosscheck(logs, args.minutes), args.verbose)
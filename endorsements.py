@@ -17,6 +17,9 @@ import re
 #####
 #####
 
+# ADIF fields the endorsement checks (and the report below) look at
+endorsement_fields = ['call', 'qso_date', 'time_on', 'band', 'mode', 'dxcc', 'state']
+
 ##### global re match objects #####
 #Hawaii
 hawaii_prefix = re.compile('^[AKNW]H[67][^/][^/]*$', flags=re.IGNORECASE)
@@ -32,11 +35,10 @@ def aloha(records):
     return record details of first entry that matches requirement'''
 
     for rec in records:
-        try:
-            if rec['dxcc']['data'] == '110':
-                return rec
-        except:
-            print("no DXCC",rec['call']['data'], rec['qso_date']['data'],file=sys.stderr)
+        if rec.dxcc is None:
+            print("no DXCC",rec.call, rec.qso_date,file=sys.stderr)
+        elif rec.dxcc == '110':
+            return rec
     return None
 
  
@@ -64,47 +66,42 @@ def china_clipper(records):
                 }
 
     for rec in records:
-        if int(rec['qso_date']['data']) > 20010704:
+        if int(rec.qso_date) > 20010704:
             if 'Hawaii' in missing:
-                try:
-                    if rec['dxcc']['data'] == '110':
-                        found['Hawaii'] = rec
-                        missing.pop('Hawaii',None)
-                        continue
-                except:
-                    print("no DXCC",rec['call']['data'], rec['qso_date']['data'],file=sys.stderr)
+                if rec.dxcc is None:
+                    print("no DXCC",rec.call, rec.qso_date,file=sys.stderr)
+                elif rec.dxcc == '110':
+                    found['Hawaii'] = rec
+                    missing.pop('Hawaii',None)
+                    continue
             if 'Taiwan' in missing:
-                try:
-                    if rec['dxcc']['data'] == '386':
-                        found['Taiwan'] = rec
-                        missing.pop('Taiwan',None)
-                        continue
-                except:
-                    print("no DXCC",rec['call']['data'], rec['qso_date']['data'],file=sys.stderr)
+                if rec.dxcc is None:
+                    print("no DXCC",rec.call, rec.qso_date,file=sys.stderr)
+                elif rec.dxcc == '386':
+                    found['Taiwan'] = rec
+                    missing.pop('Taiwan',None)
+                    continue
             if 'Philippines' in missing:
-                try:
-                    if rec['dxcc']['data'] == '375':
-                        found['Philippines'] = rec
-                        missing.pop('Philippines',None)
-                        continue
-                except:
-                    print("no DXCC",rec['call']['data'], rec['qso_date']['data'],file=sys.stderr)
+                if rec.dxcc is None:
+                    print("no DXCC",rec.call, rec.qso_date,file=sys.stderr)
+                elif rec.dxcc == '375':
+                    found['Philippines'] = rec
+                    missing.pop('Philippines',None)
+                    continue
             if 'California' in missing:
-                try:
-                    if (rec['dxcc']['data'] == '291' and rec['state']['data'].lower() == 'ca'):
-                        found['California'] = rec
-                        missing.pop('California',None)
-                        continue
-                except:
-                    print("no DXCC",rec['call']['data'], rec['qso_date']['data'],file=sys.stderr)
+                if rec.dxcc is None or (rec.dxcc == '291' and rec.state is None):
+                    print("no DXCC",rec.call, rec.qso_date,file=sys.stderr)
+                elif rec.dxcc == '291' and rec.state.lower() == 'ca':
+                    found['California'] = rec
+                    missing.pop('California',None)
+                    continue
             if 'Japan' in missing:
-                try:
-                    if rec['dxcc']['data'] == '339':
-                        found['Japan'] = rec
-                        missing.pop('Japan',None)
-                        continue
-                except:
-                    print("no DXCC",rec['call']['data'], rec['qso_date']['data'],file=sys.stderr)
+                if rec.dxcc is None:
+                    print("no DXCC",rec.call, rec.qso_date,file=sys.stderr)
+                elif rec.dxcc == '339':
+                    found['Japan'] = rec
+                    missing.pop('Japan',None)
+                    continue
 
     return found,missing
  
@@ -657,9 +654,16 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description='Process some integers.')
     parser.add_argument('inputfile', metavar='ADIF')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Parse the log even if the ADIF cache has it')
+    parser.set_defaults(use_cache=True)
     args = parser.parse_args()
 
-    records = adifparser.parse(args.inputfile)
+    # lifetime logs get big; map the file and only decode what the checks look at
+    if args.use_cache:
+        records = adifparser.parse_cached(args.inputfile, endorsement_fields, adifparser.parse_mmap)
+    else:
+        records = adifparser.parse_mmap(args.inputfile, endorsement_fields)
 
     print("checking endorsements in {}".format(args.inputfile))
     print("===== Aloha =====")
@@ -667,16 +671,16 @@ if __name__ == '__main__':
     if aloha != None:
         print("\tAloha - PASS: <CALL:{}>{} <BAND:{}>{} <QSO_DATE:{}>{} <TIME_ON:{}>{} <MODE:{}>{}"
             .format(  
-                aloha['call']['length'],
-                aloha['call']['data'],
-                aloha['band']['length'],
-                aloha['band']['data'],
-                aloha['qso_date']['length'],
-                aloha['qso_date']['data'],
-                aloha['time_on']['length'],
-                aloha['time_on']['data'],
-                aloha['mode']['length'],
-                aloha['mode']['data'],
+                len(aloha.call),
+                aloha.call,
+                len(aloha.band),
+                aloha.band,
+                len(aloha.qso_date),
+                aloha.qso_date,
+                len(aloha.time_on),
+                aloha.time_on,
+                len(aloha.mode),
+                aloha.mode,
             )
         )
     else:
@@ -691,16 +695,16 @@ if __name__ == '__main__':
                 print("\tChina Clipper {} - PASS: <CALL:{}>{} <BAND:{}>{} <QSO_DATE:{}>{} <TIME_ON:{}>{} <MODE:{}>{}"
                     .format(  
                         key,
-                        found[key]['call']['length'],
-                        found[key]['call']['data'],
-                        found[key]['band']['length'],
-                        found[key]['band']['data'],
-                        found[key]['qso_date']['length'],
-                        found[key]['qso_date']['data'],
-                        found[key]['time_on']['length'],
-                        found[key]['time_on']['data'],
-                        found[key]['mode']['length'],
-                        found[key]['mode']['data'],
+                        len(found[key].call),
+                        found[key].call,
+                        len(found[key].band),
+                        found[key].band,
+                        len(found[key].qso_date),
+                        found[key].qso_date,
+                        len(found[key].time_on),
+                        found[key].time_on,
+                        len(found[key].mode),
+                        found[key].mode,
                     )
                 )
             except:
@@ -1,13 +1,16 @@
 # member list for cross-referencing
 
-import csv
-import pprint
+import sys
 import os.path
+import bisect
+import marshal
 import collections
+import callsign
 
 
 def get_memberlist(inputfile):
     """ Helper to create the Ordered Dict of member numbers"""
+    import csv
     memberlist = collections.OrderedDict()
     with open(inputfile, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -16,40 +19,227 @@ def get_memberlist(inputfile):
     return memberlist
 
 
+def get_member_index(memberlist):
+    """
+        Helper to build the callsign lookup for is_member().  Maps the upper
+        case callsign to a list of (position, 070#, 070# string) tuples in
+        memberlist order, so a call that was reassigned keeps every number
+    """
+    member_index = {}
+    for position, entry in enumerate(memberlist):
+        number = int(entry)
+        for record in memberlist[entry]:
+            member_index.setdefault(record['call'].upper(), []).append((position, number, entry))
+    return member_index
+
+
+def get_member_intervals(memberlist):
+    """
+        Helper to build the date lookup for is_member_on().  Maps the upper
+        case callsign to a pair of lists sorted by startdate: the startdates,
+        and (startdate, enddate, position, 070# string) tuples.  Dates are
+        YYYYMMDD ints, a member with no enddate gets 99991231
+    """
+    intervals = {}
+    for position, entry in enumerate(memberlist):
+        for record in memberlist[entry]:
+            try:
+                start = int(record['startdate'])
+            except ValueError:
+                start = 0
+            try:
+                end = int(record['enddate'])
+            except ValueError:
+                end = 99991231
+            intervals.setdefault(record['call'].upper(), []).append((start, end, position, entry))
+    member_intervals = {}
+    for call in intervals:
+        spans = sorted(intervals[call])
+        member_intervals[call] = ([span[0] for span in spans], spans)
+    return member_intervals
+
+
 # Member file pulled from hamclubs.info
 _dirname = os.path.dirname(__file__)
-memberlist = get_memberlist(_dirname + '/podxs070_callsigns.txt')
+memberfile = _dirname + '/podxs070_callsigns.txt'
+# binary copy of the lookups built from memberfile (python3 members.py --build-snapshot).
+# marshal rather than pickle: it's built in, and importing pickle costs about
+# as much as parsing the CSV.  The format can change between python versions,
+# so the snapshot records which one wrote it.
+snapshotfile = _dirname + '/podxs070_callsigns.snapshot'
+# bump when the snapshot contents change so old snapshots get ignored
+snapshot_version = 2
 
+# memberlist, member_index and last_member (the newest number in the file,
+# the default max_valid) are read from memberfile the first time anything
+# asks for them.  Most contests never look up a member, so importing this
+# module (and contests.py) doesn't pay for the CSV load.
+_lazy_names = ('memberlist', 'member_index', 'member_intervals', 'last_member')
 
-def is_member(call, max_valid=None):
+
+def build_members(inputfile):
+    """ Parse the member CSV and return the lookups as a dict"""
+    memberlist = get_memberlist(inputfile)
+    return {
+        'version': snapshot_version,
+        'memberlist': memberlist,
+        'member_index': get_member_index(memberlist),
+        'member_intervals': get_member_intervals(memberlist),
+        'last_member': int(next(reversed(memberlist), 0)),
+    }
+
+
+def write_snapshot(inputfile=memberfile, outputfile=snapshotfile):
+    """ Build step: compile the member CSV into a snapshot that load_members() can read in one go"""
+    members = build_members(inputfile)
+    snapshot = dict(members)
+    snapshot['python'] = tuple(sys.version_info[:2])
+    snapshot['memberlist'] = list(members['memberlist'].items())
+    # write then rename so a reader never sees half a snapshot
+    with open(outputfile + '.tmp', 'wb') as f:
+        f.write(marshal.dumps(snapshot))
+    os.replace(outputfile + '.tmp', outputfile)
+    return members
+
+
+def read_snapshot(inputfile=memberfile, snapshot=snapshotfile):
     """
-        Walks the list of members to find the 070# that matches the callsign
-        This assumes there's a one-to-one mapping, which may not be true (eg,
-        SK reassignment), but should be generally ok.  Returns the 070# if found
-        otherwise, returns False
+        Returns the lookups from the snapshot, or None if there isn't one,
+        it's older than the member CSV, or it was written by a different
+        version of this module
     """
+    try:
+        if os.path.getmtime(snapshot) < os.path.getmtime(inputfile):
+            return None
+        with open(snapshot, 'rb') as f:
+            members = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(members, dict) or members.get('version') != snapshot_version or \
+            members.get('python') != tuple(sys.version_info[:2]):
+        return None
+    members['memberlist'] = collections.OrderedDict(members['memberlist'])
+    return members
+
 
-    splitcall = call.split('/')
+def load_members():
+    """ Read the snapshot (or memberfile) and set up the lookups, if that hasn't happened yet"""
+    global memberlist, member_index, member_intervals, last_member
+    if 'member_index' in globals():
+        return
+    members = read_snapshot()
+    if members is None:
+        members = build_members(memberfile)
+    memberlist = members['memberlist']
+    member_index = members['member_index']
+    member_intervals = members['member_intervals']
+    last_member = members['last_member']
 
+
+def __getattr__(name):
+    # module level lazy attributes (PEP 562): members.memberlist loads on first use
+    if name in _lazy_names:
+        load_members()
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def is_member(call, max_valid=None):
+    """
+        Looks up the 070# that matches the callsign, or any part of a portable
+        callsign (eg, DU1/N6HPX).  Only numbers up to max_valid count.  When
+        more than one number matches, the one listed first in the member file
+        wins.  This assumes there's a one-to-one mapping, which may not be true
+        (eg, SK reassignment), but should be generally ok.  Returns the 070# if
+        found otherwise, returns False
+    """
+
+    load_members()
     if max_valid is None:
-        last_entry = next(reversed(memberlist))
+        last_entry = last_member
     else:
-        last_entry = max_valid
+        last_entry = int(max_valid)
+
+    found = None
+    for item in callsign.call_parts(call):
+        for position, number, entry in member_index.get(item, ()):
+            if number <= last_entry:
+                if found is None or position < found[0]:
+                    found = (position, entry)
+                break
+    if found is None:
+        return False
+    return found[1]
+
+
+def resolve_members(calls, max_valid=None):
+    """ is_member() for a bunch of calls at once, returns a dict of call: 070# (or False)"""
+    resolved = {}
+    for call in calls:
+        if call not in resolved:
+            resolved[call] = is_member(call, max_valid)
+    return resolved
+
+
+def is_member_on(call, qso_date):
+    """
+        Looks up the 070# the callsign (or any part of a portable callsign)
+        held on qso_date (YYYYMMDD), going by the startdate/enddate in the
+        member file.  Unlike is_member() this needs no max_valid: numbers
+        issued after the QSO, and memberships that had ended, don't count.
+        Returns the 070# if found otherwise, returns False
+    """
+
+    load_members()
+    try:
+        day = int(qso_date)
+    except (TypeError, ValueError):
+        return False
+
+    found = None
+    for item in callsign.call_parts(call):
+        if item not in member_intervals:
+            continue
+        starts, spans = member_intervals[item]
+        # spans that started on or before the QSO; a call rarely has more than one
+        i = bisect.bisect_right(starts, day)
+        while i > 0:
+            i -= 1
+            start, end, position, entry = spans[i]
+            if day <= end:
+                if found is None or position < found[0]:
+                    found = (position, entry)
+                break
+    if found is None:
+        return False
+    return found[1]
 
-    for entry in memberlist:
-        if int(entry) <= int(last_entry):
-            for record in memberlist[entry]:
-                if len(splitcall) == 1:
-                    if call.upper() == record['call'].upper():
-                        return entry
-                else:
-                    for item in splitcall:
-                        if item.upper() == record['call'].upper():
-                            return entry
-    return False
+
+def resolve_members_on(qsos):
+    """
+        is_member_on() for a bunch of (call, qso_date) pairs at once, returns
+        a dict of (call, qso_date): 070# (or False)
+    """
+    resolved = {}
+    for call, qso_date in qsos:
+        if (call, qso_date) not in resolved:
+            resolved[(call, qso_date)] = is_member_on(call, qso_date)
+    return resolved
 
 
 if __name__ == '__main__':
-    dirname = os.path.dirname(__file__)
-    memberlist = get_memberlist(dirname + '/podxs070_callsigns.txt')
-    pprint.pprint(memberlist)
+    import argparse
+    import pprint
+
+    parser = argparse.ArgumentParser(description='070 Club member list')
+    parser.add_argument('--build-snapshot', dest='build_snapshot', action='store_true',
+                        help='Compile {} into {}'.format(os.path.basename(memberfile), os.path.basename(snapshotfile)))
+    args = parser.parse_args()
+
+    if args.build_snapshot:
+        snapshot = write_snapshot()
+        print('wrote {} ({} member numbers, {} calls)'.format(snapshotfile, len(snapshot['memberlist']),
+                                                               len(snapshot['member_index'])))
+    else:
+        memberlist = get_memberlist(memberfile)
+        pprint.pprint(memberlist)
@@ -6,7 +6,7 @@
 
 import sys
 
-def test_record(entry, conditions, valid_records):
+def test_record(entry, conditions, valid_records, dupe_index=None):
     # Walk through each adif entry and validate against a bunch of stuff
 
     errors = ['not_valid_band', 'is_not_psk', 'is_dupe']
@@ -17,10 +17,13 @@ def test_record(entry, conditions, valid_records):
     if contests.rec_is_psk(entry, conditions['valid_modes'], None):
         errors.remove('is_not_psk')
 
-    if contests.rec_is_not_dupe(entry, valid_records):
+    if contests.rec_is_not_dupe(entry, valid_records, dupe_index):
         errors.remove('is_dupe')
 
     if len(errors) == 0:
+        # the caller is about to add entry to valid_records, keep the index in step
+        if dupe_index is not None:
+            dupe_index.add(contests.dupe_key(entry))
         return True, None
     else:
         return False, errors
@@ -34,12 +37,12 @@ def qso_validate(adif_files):
                    }
     valid_records = []
     invalid_records = []
+    dupe_index = set()
     # loop through adif files
     # for each adif file, grab summary info
     for entry in adif_files:
-        for record in adif_files[entry]:
-            s_record = contests.synthesize_fields(record)
-            status, errors = test_record(s_record, conditions, valid_records)
+        for s_record in contests.synthesize_log(adif_files[entry]):
+            status, errors = test_record(s_record, conditions, valid_records, dupe_index)
             if errors:
                 invalid_records.append({'data': s_record, 'errors': errors})
             else:
@@ -58,7 +61,10 @@ if __name__ == '__main__':
     parser.add_argument('--call', metavar='CALL')
     parser.add_argument('--adif', metavar='ADIF', nargs='*')
     parser.add_argument('--debug', dest='debug', action='store_true')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Parse the logs even if the ADIF cache has them')
     parser.set_defaults(debug=False)
+    parser.set_defaults(use_cache=True)
     args = parser.parse_args()
 
     adif_files = {}
@@ -69,7 +75,10 @@ if __name__ == '__main__':
             print('File {} not found; skipping'.format(adif), file=sys.stderr)
         else:
             name = os.path.basename(rootname)
-            adif_files[name] = adifparser.parse(adif)
+            if args.use_cache:
+                adif_files[name] = adifparser.parse_cached(adif, contests.get_adif_fields())
+            else:
+                adif_files[name] = adifparser.iter_records(adif, contests.get_adif_fields())
 
     if len(adif_files) == 0:
         print("No files found: Exiting", file=sys.stderr)
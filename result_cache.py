@@ -0,0 +1,151 @@
+#!/usr/local/bin/python3
+#
+# result_cache.py
+#
+# on-disk cache of contest results
+#
+# The same ADIF gets scored again and again (the upload page's debug run,
+# regenerating results, re-uploads of an unchanged log).  run_contest()'s
+# valid/invalid entries and scores are kept here, keyed by the ADIF bytes,
+# the entrant's summary row, the contest, the year and the scorer version,
+# so a repeat run skips parsing and scoring.
+#
+# One pickle per result in cachedir ($CHECKER_CACHE, else under
+# $XDG_CACHE_HOME or ~/.cache, never in the checker tree, which the web user
+# may not be able to write); reading a result bumps its mtime and the least
+# recently used results are removed once the directory is over max_bytes.
+# A cache that can't be written is skipped without a word, so the scripts'
+# output is the same either way.
+
+import os
+import json
+import pickle
+import hashlib
+import argparse
+import tempfile
+import members
+
+_dirname = os.path.dirname(os.path.abspath(__file__))
+cachedir = os.environ.get('CHECKER_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'checker', 'results')
+max_bytes = int(os.environ.get('CHECKER_CACHE_SIZE', 256 * 1024 * 1024))
+suffix = '.result'
+
+# anything whose change can change a score; see scorer_version()
+scorer_sources = ['contests.py', 'adifparser.py', 'members.py', 'callsign.py', 'columnar.py', 'cty.dat']
+_scorer_version = None
+
+
+def scorer_version():
+    """ digest of the scoring code and the member CSV it looks members up in"""
+    global _scorer_version
+    if _scorer_version is None:
+        digest = hashlib.sha1()
+        for source in scorer_sources:
+            with open(os.path.join(_dirname, source), 'rb') as f:
+                digest.update(f.read())
+        stat = os.stat(members.memberfile)
+        digest.update('{} {}'.format(stat.st_size, stat.st_mtime_ns).encode('ascii'))
+        _scorer_version = digest.hexdigest()
+    return _scorer_version
+
+
+def file_digest(path, blocksize=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def result_key(contest, year, summary, adif_files):
+    """
+        Cache key for scoring adif_files (paths, in order) for the entrant
+        whose summary row is summary.  None if an ADIF can't be read, so the
+        caller scores as usual and reports the problem the usual way
+    """
+    try:
+        adifs = [(os.path.basename(adif), file_digest(adif)) for adif in adif_files]
+    except OSError:
+        return None
+    key = [scorer_version(), contest, int(year), sorted((summary or {}).items()), adifs]
+    return hashlib.sha1(json.dumps(key, default=str).encode('utf-8')).hexdigest()
+
+
+def get(key, directory=None):
+    """ (valid_entries, invalid_entries, scores) cached under key, or None"""
+    if key is None:
+        return None
+    path = os.path.join(directory or cachedir, key + suffix)
+    try:
+        with open(path, 'rb') as f:
+            result = pickle.load(f)
+        # mtime is the LRU clock
+        os.utime(path)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    return result
+
+
+def put(key, result, directory=None, limit=None):
+    """ cache result under key, then trim the cache; a cache that can't be written is skipped"""
+    if key is None:
+        return
+    directory = directory or cachedir
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # write then rename so a reader never sees half a result
+        fd, tmpname = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, os.path.join(directory, key + suffix))
+        evict(directory, limit)
+    except OSError:
+        pass
+
+
+def evict(directory=None, limit=None):
+    """ remove least recently used results until the cache fits in limit bytes"""
+    directory = directory or cachedir
+    limit = max_bytes if limit is None else limit
+    entries = []
+    total = 0
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(suffix):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total += stat.st_size
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def clear(directory=None):
+    return evict(directory, 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Contest result cache')
+    parser.add_argument('--clear', action='store_true', help='Remove every cached result')
+    parser.add_argument('--trim', action='store_true', help='Remove least recently used results down to the size limit')
+    args = parser.parse_args()
+
+    if args.clear:
+        clear()
+    elif args.trim:
+        evict()
+    if os.path.isdir(cachedir):
+        print('{}: {:.1f} MB of {:.1f} MB'.format(cachedir, evict(limit=float('inf')) / 1e6, max_bytes / 1e6))
+    else:
+        print('{}: empty'.format(cachedir))
@@ -0,0 +1,159 @@
+#!/usr/local/bin/python3
+#
+# score_all.py
+#
+# score every entrant in a contest_report.php summary CSV in one process
+#
+# The contest scripts score one call per run; this loads contests, the
+# member list and the DXCC tables once and goes through the whole field,
+# printing the same score line the scripts print with --score-only.
+
+import io
+import sys
+import argparse
+import traceback
+import contextlib
+import concurrent.futures
+import adifparser
+import contests
+import result_cache
+import os.path
+
+
+def get_conditions(contest, year, conditions_cache):
+    """ set_conditions() once per contest/year; each entrant gets its own copy to add to"""
+    if (contest, year) not in conditions_cache:
+        conditions_cache[(contest, year)] = contests.set_conditions(year, contest)
+    return dict(conditions_cache[(contest, year)])
+
+
+def score_entrant(contest, year, conditions, entrant, use_cache=True, backend=None):
+    """ run_contest() on the ADIF named in the entrant's summary row, or its cached result"""
+    adif = entrant['adif_file']
+    cache_key = result_cache.result_key(contest, year, entrant, [adif]) if use_cache else None
+    result = result_cache.get(cache_key)
+    if result is None:
+        name = os.path.basename(os.path.splitext(adif)[0])
+        adif_files = {name: adifparser.iter_records(adif, conditions['adif_fields'])}
+        result = contests.run_contest(contests.contest_specs[contest], adif_files, conditions, entrant,
+                                      backend)
+        result_cache.put(cache_key, result)
+    return result
+
+
+def score_line(contest, scores, entrant):
+    """ the header and CSV line <contest>.py --score-only prints for the entrant"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        contests.contest_specs[contest]['print_score'](scores, entrant, argparse.Namespace(score_only=True))
+    return output.getvalue().splitlines()
+
+
+def entrant_contest(entrant, contest=None, year=None):
+    """ contest name and year for a summary row; contest/year override the row's columns"""
+    if contest is None:
+        contest = entrant['contest_name']
+    if year is None:
+        year = entrant['year']
+    if contest not in contests.contest_specs:
+        raise ValueError('unknown contest {}'.format(contest))
+    return contest, int(year)
+
+
+# conditions built so far in this process (each --jobs worker has its own)
+_conditions_cache = {}
+
+
+def score_one(callsign, entrant, contest=None, year=None, use_cache=True, backend=None):
+    """
+        Score one entrant and return its result dict.  Anything that goes
+        wrong (missing or malformed ADIF, bad summary row, ...) ends up in
+        the result's error instead of stopping the rest of the field
+    """
+    result = {
+        'callsign': callsign,
+        'contest': contest,
+        'year': year,
+        'valid': [],
+        'invalid': [],
+        'scores': None,
+        'report': [],
+        'error': None,
+    }
+    try:
+        result['contest'], result['year'] = entrant_contest(entrant, contest, year)
+        conditions = get_conditions(result['contest'], result['year'], _conditions_cache)
+        result['valid'], result['invalid'], result['scores'] = score_entrant(result['contest'], result['year'],
+                                                                             conditions, entrant, use_cache,
+                                                                             backend)
+        result['report'] = score_line(result['contest'], result['scores'], entrant)
+    except Exception:
+        result['error'] = traceback.format_exc(limit=-1).strip().splitlines()[-1]
+    return result
+
+
+def _score_one_job(job):
+    return score_one(*job)
+
+
+def score_all(summary, contest=None, year=None, jobs=1, use_cache=True, backend=None):
+    """
+        Score every entrant in summary (summary_parser() output).  Returns a
+        list of result dicts in summary order: callsign, contest, year,
+        valid, invalid, scores, report (the --score-only lines) and error
+        (None, or why the entrant couldn't be scored).  jobs > 1 spreads the
+        entrants over that many worker processes; use_cache=False ignores
+        the result cache; backend is passed on to run_contest()
+    """
+    work = [(callsign, summary[callsign], contest, year, use_cache, backend) for callsign in summary]
+    if jobs <= 1 or len(work) <= 1:
+        return [_score_one_job(job) for job in work]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        # map() hands results back in submission order, whichever worker finishes first
+        return list(executor.map(_score_one_job, work))
+
+
+def print_results(results, outputfile=sys.stdout):
+    """ one results table: each header line once, then the entrants' score lines"""
+    header = None
+    for result in results:
+        if result['error'] is not None:
+            print('{}: not scored: {}'.format(result['callsign'], result['error']), file=sys.stderr)
+            continue
+        if not result['report']:
+            continue
+        # vdsprint/saintpat add columns, so a field can need more than one header
+        if result['report'][0] != header:
+            if header is not None:
+                print(file=outputfile)
+            header = result['report'][0]
+            print(header, file=outputfile)
+        for line in result['report'][1:]:
+            print(line, file=outputfile)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score every entrant in a summary CSV')
+    parser.add_argument('--summary', metavar='SUMMARY', required=True)
+    parser.add_argument('--delim', metavar='DELIMITER', default=',')
+    parser.add_argument('--contest', metavar='CONTEST', choices=list(contests.contest_specs),
+                        help='Contest for every entrant (default: the contest_name column)')
+    parser.add_argument('--year', metavar='YEAR', type=int, help='Year for every entrant (default: the year column)')
+    parser.add_argument('--jobs', metavar='N', type=int, default=1, help='Score entrants in N processes')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Score every log even if the result cache has it')
+    parser.add_argument('--backend', choices=['python', 'numpy'], default=contests.default_backend,
+                        help='How QSOs are checked: one at a time, or as NumPy columns (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.backend == 'numpy':
+        import columnar
+        if not columnar.available():
+            print('NumPy is not installed, using the python backend', file=sys.stderr)
+            args.backend = 'python'
+
+    summary = contests.summary_parser(args.summary, args.delim)
+    results = score_all(summary, args.contest, args.year, args.jobs, args.use_cache, args.backend)
+    print_results(results)
+    if any(result['error'] is not None for result in results):
+        exit(1)
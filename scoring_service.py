@@ -0,0 +1,166 @@
+#!/usr/local/bin/python3
+#
+# scoring_service.py
+#
+# long running scoring service on a Unix socket
+#
+# Importing contests (and its tables) and loading the member list costs every
+# contest script run a good part of its time.  This loads them once and then
+# runs the contest scripts' command line for each request in a forked child,
+# so every request starts from the same warm, untouched state.
+#
+# Protocol: one JSON line in, one JSON line out
+#   request:  {"script": "tdw.py", "argv": ["--year", "2024", ...], "cwd": "/path"}
+#   response: {"status": 0, "output": "..."}
+# output is stdout and stderr together, in the order they were written, the
+# way upload_results.php's 2>&1 sees a direct run.  cwd has to be inside the
+# checker tree (CHECKER_ROOT, default this directory).
+#
+# The socket lives in a directory only this user can get into, and only
+# processes running as this user are served.
+#
+# Each request gets scoring_client.request_timeout seconds ($CHECKER_TIMEOUT):
+# the socket reads and writes time out, and the child is killed if the run
+# itself takes longer.  The client gives up at the same point and runs the
+# script itself.
+#
+# scoring_client.py is the command line side (see upload_results.php)
+
+import io
+import os
+import sys
+import json
+import signal
+import argparse
+import traceback
+import contextlib
+import socketserver
+import contest_cli
+import contests
+import members
+import scoring_client
+
+default_socket = scoring_client.default_socket
+checker_root = os.path.realpath(os.environ.get('CHECKER_ROOT', os.path.dirname(os.path.abspath(__file__))))
+
+
+def script_contest(script):
+    """ contest name for a contest script name or path (tdw.py, ./tdw.py, tdw)"""
+    return os.path.splitext(os.path.basename(script.strip()))[0]
+
+
+def exit_status(code):
+    """ the process exit status sys.exit(code) would give"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def in_checker_tree(path):
+    """ True if path is checker_root or somewhere under it, symlinks followed"""
+    path = os.path.realpath(path)
+    return path == checker_root or path.startswith(checker_root + os.sep)
+
+
+def run_script(script, argv, cwd=None):
+    """
+        Run a contest script's command line in this process and return
+        (exit status, its stdout and stderr as one text).  ValueError if cwd
+        is outside the checker tree
+    """
+    if cwd and not in_checker_tree(cwd):
+        raise ValueError('working directory {} is outside {}'.format(cwd, checker_root))
+    output = io.StringIO()
+    status = 0
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            if cwd:
+                os.chdir(cwd)
+            contest = script_contest(script)
+            if contest not in contests.contest_specs:
+                print('Unknown contest script {}: Exiting'.format(script), file=sys.stderr)
+                status = 1
+            else:
+                # argparse usage and error messages name the script, as they would when run directly
+                sys.argv = [script.strip()] + list(argv)
+                contest_cli.main(contest, list(argv))
+        except SystemExit as e:
+            status = exit_status(e.code)
+        except Exception:
+            traceback.print_exc()
+            status = 1
+    return status, output.getvalue()
+
+
+class ScoringHandler(socketserver.StreamRequestHandler):
+    # socket reads and writes (setup() applies it)
+    timeout = scoring_client.request_timeout
+
+    def handle(self):
+        # this is the forked child: SIGALRM's default action ends it
+        signal.alarm(max(1, int(self.timeout)))
+        uid = scoring_client.peer_uid(self.request)
+        if uid is not None and uid != os.getuid():
+            # not one of ours; say nothing
+            return
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+            status, output = run_script(request['script'], request.get('argv', []), request.get('cwd'))
+        except (ValueError, KeyError, TypeError) as e:
+            status, output = 2, 'Bad request: {}\n'.format(e)
+        response = {'status': status, 'output': output}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class ScoringServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def warm_up():
+    """ load what importing contests leaves for the first lookup (the member list)"""
+    members.load_members()
+
+
+def make_socket_dir(path):
+    """ create the socket's directory, 0700; refuse one somebody else could have set up"""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    if not scoring_client.private_dir(directory):
+        raise SystemExit('{} must be a directory owned by this user with mode 0700'.format(directory))
+
+
+def serve(path=default_socket):
+    make_socket_dir(path)
+    if os.path.exists(path):
+        os.unlink(path)
+    warm_up()
+    # a plain kill should still remove the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # nobody else gets to connect, whatever the umask
+    old_umask = os.umask(0o177)
+    try:
+        server = ScoringServer(path, ScoringHandler)
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, 0o600)
+    with server:
+        try:
+            server.serve_forever()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Contest scoring service')
+    parser.add_argument('--socket', metavar='PATH', default=default_socket,
+                        help='Unix socket to listen on (default: {})'.format(default_socket))
+    args = parser.parse_args()
+    serve(args.socket)
@@ -0,0 +1,245 @@
+import os
+import pytest
+import adifparser
+import contests
+
+
+def values(records, names=('call', 'band', 'mode', 'comment')):
+    return [{name: rec.value(name) for name in names if rec.value(name) is not None} for rec in records]
+
+
+def test_scan_records_matches_parse_record():
+    text = ('<call:4>W1AW<band:3>20m<mode:5>PSK31<eor>\n'
+            '<CALL:5>KA3X <BAND:3:S>40m <MODE:4>RTTY <EOR>\r\n'
+            '<call:5>AG4CZ<band:3>80m<EOR>\n')
+    records, leftover = adifparser.scan_records(text)
+    old, old_leftover = adifparser.parse_record(text)
+    assert values(records) == [{name: field['data'] for name, field in rec.items()} for rec in old]
+    # parse_record() also ate the text after <EOR>
+    assert leftover.strip() == old_leftover == ''
+
+
+def test_value_with_tags_in_it():
+    # the regex tokenizer split the comment at <b>
+    text = '<call:4>W3HF<comment:18>big <b>signal</b>!<band:3>20m<eor>'
+    records, leftover = adifparser.scan_records(text)
+    assert values(records) == [{'call': 'W3HF', 'comment': 'big <b>signal</b>!', 'band': '20m'}]
+    assert records[0].errors is None
+
+
+def test_value_with_a_fake_eor_in_it():
+    records, leftover = adifparser.scan_records('<comment:9>pse <EOR><call:4>W1AW<eor>')
+    assert values(records) == [{'comment': 'pse <EOR>', 'call': 'W1AW'}]
+
+
+def test_zero_length_field():
+    records, leftover = adifparser.scan_records('<call:4>W1AW<state:0><band:3>20m<eor>')
+    assert records[0].state == ''
+    assert records[0].band == '20m'
+    # synthesize_fields() drops it
+    records[0].drop_empty()
+    assert records[0].state is None
+
+
+def test_record_cut_off_at_the_end_of_the_buffer():
+    text = '<call:4>W1AW<eor><call:4>KA3X<band:3>20'
+    records, leftover = adifparser.scan_records(text)
+    assert values(records) == [{'call': 'W1AW'}]
+    # the partial record comes back whole, to be finished by the next read
+    assert leftover == '<call:4>KA3X<band:3>20'
+    records, leftover = adifparser.scan_records(leftover + 'm<eor>')
+    assert values(records) == [{'call': 'KA3X', 'band': '20m'}]
+    assert leftover == ''
+
+
+def test_data_is_sliced_by_length_then_stripped():
+    # parse_record() stripped the text after a tag, then took length
+    # characters; ADIF data starts right after the >, so now exactly length
+    # characters are taken and then stripped
+    text = '<call:4> W1AW<name:6>Bob   <eor>'
+    records, leftover = adifparser.scan_records(text)
+    assert records[0].call == 'W1A'
+    assert records[0].name == 'Bob'
+    old, old_leftover = adifparser.parse_record(text)
+    assert old[0]['call']['data'] == 'W1AW'
+
+
+def test_empty_records_are_dropped():
+    records, leftover = adifparser.scan_records('<eor>\n<EoR><call:4>W1AW<eor>\n<eor>')
+    assert values(records) == [{'call': 'W1AW'}]
+
+
+def test_broken_tags_go_to_errors():
+    records, leftover = adifparser.scan_records('<call:>W1AW<band:3>20m<eor><mode:>PSK31<eor>')
+    assert [rec.errors for rec in records] == [['<call:>'], ['<mode:>']]
+    assert records[0].band == '20m'
+    # a record with nothing but errors is still handed back
+    assert values(records[1:]) == [{}]
+
+
+def test_scan_header():
+    header, rest = adifparser.scan_header('Log export <adif_ver:5>3.1.4 <programid:4>N1MM\n<EOH>\n<call:4>W1AW<eor>')
+    assert header == {'adif_ver': {'length': 5, 'data': '3.1.4'}, 'programid': {'length': 4, 'data': 'N1MM'}}
+    assert rest == '\n<call:4>W1AW<eor>'
+    # no <EOH> yet: wait for more
+    assert adifparser.scan_header('Log export <adif_ver:5>3.1') == (None, 'Log export <adif_ver:5>3.1')
+
+
+
+log_text = ('Exported by hand <adif_ver:5>3.1.4\r\n<eoh>\r\n'
+            '<call:4>W1AW<qso_date:8>20240101<name:6>M\xfcller<comment:13>a <b>bold</b><eor>\r\n'
+            '<call:5>KA3X <band:3>20m<srx_string:4>PA 1<state:0><eor>\r\n'
+            '<call:5>AG4CZ<band:3>40m<mode:5>PSK31<eor>\r\n')
+
+
+def write_log(tmp_path, text=log_text, name='log.adi'):
+    path = tmp_path / name
+    path.write_bytes(text.encode('ISO-8859-1'))
+    return str(path)
+
+
+def expected_records(text=log_text):
+    return repr(adifparser.scan_records(text[text.index('<eoh>') + 5:])[0])
+
+
+def test_iter_records_across_reads(tmp_path):
+    path = write_log(tmp_path)
+    assert 'M\xfcller' in expected_records() and '<b>bold</b>' in expected_records()
+    # one of these splits every tag and every value between two reads
+    for blocksize in range(1, len(log_text) + 2):
+        assert repr(list(adifparser.iter_records(path, blocksize=blocksize))) == expected_records(), blocksize
+
+
+def test_iter_records_across_64k_reads(tmp_path):
+    record = '<call:4>W1AW<comment:20>' + 'x' * 20 + '<eor>\n'
+    filler = '<eoh>\n' + record * (65536 // len(record) - 1)
+    # a tag, then a value, straddling the first 64KB read
+    for cut in [5, -10]:
+        pad = 65536 - len(filler) + cut
+        text = filler + '<call:4>W1AW<notes:{}>'.format(pad) + 'y' * pad + record * 3
+        assert len(text) > 65536
+        path = write_log(tmp_path, text)
+        records = list(adifparser.iter_records(path))
+        assert repr(records) == expected_records(text)
+        assert len(records) == text.count('<eor>')
+
+
+def test_iter_records_mmap_decodes_like_iter_records(tmp_path):
+    path = write_log(tmp_path)
+    records = adifparser.parse_mmap(path)
+    assert repr(records) == expected_records()
+    assert len(records) == 3
+    assert records[0].name == 'M\xfcller'
+    assert records[1].state == ''
+    assert adifparser.parse_mmap(write_log(tmp_path, '', 'empty.adi')) == []
+
+
+def test_fields_are_skipped_by_length():
+    # the skipped value looks like a tag; it must not be read as one
+    text = '<call:4>W1AW<app_n1mm_misctext:9><mode:4>x<band:3>20m<eor>'
+    records, leftover = adifparser.scan_records(text, frozenset(['call', 'band']))
+    assert values(records, ('call', 'band', 'mode', 'app_n1mm_misctext')) == [{'call': 'W1AW', 'band': '20m'}]
+
+
+@pytest.mark.parametrize('parser', [adifparser.parse, adifparser.parse_mmap])
+def test_field_projection(tmp_path, parser):
+    path = write_log(tmp_path)
+    records = parser(path, ['CALL', 'Name', 'srx_string'])
+    assert [sorted(rec.keys()) for rec in records] == [['call', 'name'], ['call', 'srx_string'], ['call']]
+    assert records[0].name == 'M\xfcller'
+    assert records[1].srx_string == 'PA 1'
+    # what the other fields would have been is gone, not just hidden
+    assert all(rec.band is None and rec.extras is None for rec in records)
+
+
+def test_contest_fields_cover_what_scoring_reads():
+    fields = set(contests.get_adif_fields())
+    assert set(contests.dupe_fields) <= fields
+    assert {'qso_date', 'time_on', 'freq', 'submode', 'state', 'dxcc', 'srx_string'} <= fields
+    assert 'class' in contests.get_adif_fields('vdsprint')
+
+
+def counting(parser):
+    calls = []
+
+    def parse(inputfile, fields=None):
+        calls.append(fields)
+        return parser(inputfile, fields)
+    parse.__name__ = parser.__name__
+    return parse, calls
+
+
+def test_parse_cached_hit(tmp_path):
+    path = write_log(tmp_path)
+    parser, calls = counting(adifparser.parse)
+    first = adifparser.parse_cached(path, parser=parser, directory=str(tmp_path / 'cache'))
+    first[0].call = 'changed'
+    second = adifparser.parse_cached(path, parser=parser, directory=str(tmp_path / 'cache'))
+    assert len(calls) == 1
+    # fresh records every time, whatever the caller did to the last ones
+    assert repr(second) == expected_records()
+
+
+def test_parse_cached_log_rewritten_in_place(tmp_path):
+    path = write_log(tmp_path)
+    cache = str(tmp_path / 'cache')
+    stat = os.stat(path)
+    assert repr(adifparser.parse_cached(path, directory=cache)) == expected_records()
+    # same size and mtime, different contents: only the digest can tell
+    rewritten = log_text.replace('W1AW', 'K1AW')
+    write_log(tmp_path, rewritten)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(path).st_size == stat.st_size
+    assert repr(adifparser.parse_cached(path, directory=cache)) == expected_records(rewritten)
+
+
+def test_parse_cached_keys_on_fields_and_parser(tmp_path):
+    path = write_log(tmp_path)
+    cache = str(tmp_path / 'cache')
+    parse, parse_calls = counting(adifparser.parse)
+    parse_mmap, mmap_calls = counting(adifparser.parse_mmap)
+    full = adifparser.parse_cached(path, parser=parse, directory=cache)
+    calls = adifparser.parse_cached(path, ['call'], parser=parse, directory=cache)
+    assert [rec.keys() for rec in calls] == [['call']] * 3
+    assert repr(adifparser.parse_cached(path, parser=parse, directory=cache)) == repr(full)
+    assert parse_calls == [None, ['call']]
+    adifparser.parse_cached(path, parser=parse_mmap, directory=cache)
+    assert mmap_calls == [None]
+    assert len(os.listdir(cache)) == 3
+
+
+def test_parse_cached_without_a_cache_directory(tmp_path, capsys):
+    path = write_log(tmp_path)
+    # a file where the directory should be: nothing can be cached, nothing is said
+    blocked = tmp_path / 'blocked'
+    blocked.write_text('')
+    assert repr(adifparser.parse_cached(path, directory=str(blocked / 'cache'))) == expected_records()
+    assert capsys.readouterr() == ('', '')
+
+
+def test_dict_style_access_is_read_only():
+    rec = adifparser.scan_records('<call:5>KC3FL<band:3>20m<app_x:2>hi<mode:><eor>')[0][0]
+    assert dict(rec['call']) == {'length': 5, 'data': 'KC3FL'}
+    assert rec['app_x']['data'] == 'hi'
+    with pytest.raises(TypeError):
+        rec['call']['data'] = 'W1AW'
+    rec['call'] = 'W1AW'
+    rec['band'] = rec['band']
+    assert (rec.call, rec.band) == ('W1AW', '20m')
+    del rec['app_x']
+    assert 'app_x' not in rec and rec.extras == {}
+    with pytest.raises(KeyError):
+        rec['mode']
+
+
+def test_contains_agrees_with_the_attributes():
+    rec = adifparser.scan_records('<call:5>KC3FL<mode:><eor>')[0][0]
+    assert 'errors' in rec and rec['errors'] is rec.errors == ['<mode:>']
+    rec['errors'].append('more')
+    assert rec.errors == ['<mode:>', 'more']
+    assert 'member_number' not in rec
+    rec['member_number'] = '1234'
+    assert 'member_number' in rec and rec.member_number == rec['member_number'] == '1234'
+    del rec['errors']
+    assert 'errors' not in rec and rec.errors is None
+    assert 'call' in rec and 'band' not in rec
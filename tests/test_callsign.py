@@ -0,0 +1,57 @@
+import pytest
+import callsign
+
+
+@pytest.mark.parametrize('call, base, prefix, suffix, portable', [
+    ('KA3X', 'KA3X', 'KA3', 'X', ()),
+    ('ka3x', 'KA3X', 'KA3', 'X', ()),
+    ('KA3X3', 'KA3X3', 'KA3', 'X3', ()),
+    ('3DA0XYZ', '3DA0XYZ', '3DA0', 'XYZ', ()),
+    ('2E0ABC', '2E0ABC', '2E0', 'ABC', ()),
+    ('W9SMR/9', 'W9SMR', 'W9', 'SMR', ('9',)),
+    ('W9SMR/P', 'W9SMR', 'W9', 'SMR', ('P',)),
+    ('DU1/N6HPX', 'N6HPX', 'DU1', 'HPX', ('DU1',)),
+    ('N6HPX/DU1', 'N6HPX', 'DU1', 'HPX', ('DU1',)),
+    ('W1AW/KH6', 'W1AW', 'KH6', 'AW', ('KH6',)),
+    ('KH6/W1AW/P', 'W1AW', 'KH6', 'AW', ('KH6', 'P')),
+    ('N0NM/MM', 'N0NM', 'N0', 'NM', ('MM',)),
+    ('NØNM', 'N0NM', 'N0', 'NM', ()),
+    # parts of the same length: a full call beats a bare prefix, whichever comes first
+    ('KH6/W1A', 'W1A', 'KH6', 'A', ('KH6',)),
+    ('W1A/KH6', 'W1A', 'KH6', 'A', ('KH6',)),
+    # and with nothing to tell them apart, the written order still doesn't matter
+    ('KH6/AB1', 'KH6', 'AB1', '', ('AB1',)),
+    ('AB1/KH6', 'KH6', 'AB1', '', ('AB1',)),
+    ('K1AB/W1AW', 'W1AW', 'K1AB', 'AW', ('K1AB',)),
+    ('W1AW/K1AB', 'W1AW', 'K1AB', 'AW', ('K1AB',)),
+    ('', '', '', '', ()),
+])
+def test_parse_call(call, base, prefix, suffix, portable):
+    parsed = callsign.parse_call(call)
+    assert (parsed.base, parsed.prefix, parsed.suffix, parsed.portable) == (base, prefix, suffix, portable)
+
+
+@pytest.mark.parametrize('call, station', [
+    ('W9SMR', 'W9SMR'),
+    ('W9SMR/9', 'W9SMR'),
+    ('w9smr/p', 'W9SMR'),
+    ('DU1/N6HPX', 'DU1/N6HPX'),
+    ('N6HPX/DU1', 'DU1/N6HPX'),
+    ('W1AW/KH6', 'KH6/W1AW'),
+    ('KH6/W1A', 'KH6/W1A'),
+    ('W1A/KH6', 'KH6/W1A'),
+    ('KH6/AB1', 'AB1/KH6'),
+    ('AB1/KH6', 'AB1/KH6'),
+])
+def test_station(call, station):
+    assert callsign.station(call) == station
+
+
+@pytest.mark.parametrize('call, parts', [
+    ('DU1/N6HPX', ('DU1', 'N6HPX')),
+    (' w9smr/p ', ('W9SMR', 'P')),
+    ('NØNM//MM', ('N0NM', 'MM')),
+    ('/', ()),
+])
+def test_call_parts(call, parts):
+    assert callsign.call_parts(call) == parts
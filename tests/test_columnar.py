@@ -0,0 +1,125 @@
+import copy
+import random
+import datetime
+import pytest
+import adifparser
+import contests
+import columnar
+
+pytestmark = pytest.mark.skipif(not columnar.available(), reason='NumPy not installed')
+
+summaries = {
+    'pskfest': [{'contest_name': 'pskfest'}],
+    'vdsprint': [{'contest_name': 'vdsprint'}],
+    'firecracker': [{'contest_name': 'firecracker', 'block_start_time': start} for start in ['2000', '0100', '0300']],
+    'thirtyone': [{'contest_name': 'thirtyone', 'block_start_time': start} for start in ['1000', '0600']],
+    'tdw': [{'contest_name': 'tdw'}],
+    'tripleplay': [{'contest_name': 'tripleplay', 'saturday_start_time': '0000', 'sunday_start_time': 'None',
+                    'monday_start_time': '1200'}],
+}
+
+
+def random_log(conditions, size, rng, missing_calls=0.02):
+    """ QSOs around the contest with odd bands and modes, missing calls, portable calls and dupes"""
+    log = []
+    for i in range(size):
+        rec = adifparser.QSO()
+        if rng.random() >= missing_calls:
+            rec.call = rng.choice(['KA3X', 'AG4CZ', 'W9SMR', 'W9SMR/9', 'DU1/N6HPX', 'ja1abc', 'VE3XYZ/P'])
+        when = conditions['contest_start'] + datetime.timedelta(minutes=rng.randint(-600, 3600))
+        rec.qso_date = when.strftime('%Y%m%d')
+        rec.time_on = when.strftime('%H%M%S' if rng.random() < 0.5 else '%H%M')
+        rec.band = rng.choice(['80m', '40m', '20m', '20M', '15m', '160m', None])
+        rec.mode = rng.choice(['PSK31', 'BPSK31', 'CW', None])
+        rec.dxcc = rng.choice(['291', '1', '110', '339', None])
+        rec.state = rng.choice(['PA', 'ca', 'CA', 'ON', None])
+        rec.srx_string = rng.choice(['1', '2500', 'PA', 'YL', None])
+        log.append(rec)
+    return log
+
+
+def run(contest, log, summary, backend):
+    conditions = contests.set_conditions(2024, contest)
+    spec = contests.contest_specs[contest]
+    # each backend gets its own copy: synthesize_fields() and the enrichers change the records
+    return contests.run_contest(spec, {'log': copy.deepcopy(log)}, conditions, summary, backend)
+
+
+@pytest.mark.parametrize('contest', sorted(summaries))
+def test_backends_agree(contest):
+    rng = random.Random(contest)
+    conditions = contests.set_conditions(2024, contest)
+    for summary in summaries[contest]:
+        for size in [0, 1, 5, 50, 300]:
+            # TDW looks every call up in the member list, so its logs need calls
+            log = random_log(conditions, size, rng, 0 if contest == 'tdw' else 0.02)
+            python = run(contest, log, summary, 'python')
+            numpy = run(contest, log, summary, 'numpy')
+            assert repr(numpy[0]) == repr(python[0])
+            assert repr(numpy[1]) == repr(python[1])
+            assert repr(numpy[2]) == repr(python[2])
+
+
+def test_dupes_keep_the_first_valid_qso():
+    conditions = contests.set_conditions(2024, 'pskfest')
+    log = random_log(conditions, 0, random.Random(0))
+    for when, band, call in [('0100', '20m', 'KA3X'), ('0110', '20m', 'KA3X/P'), ('0120', 'xx', 'AG4CZ'),
+                             ('0130', '20m', 'AG4CZ'), ('0140', '20m', 'AG4CZ')]:
+        rec = adifparser.QSO()
+        rec.call, rec.band, rec.mode = call, band, 'PSK31'
+        rec.qso_date, rec.time_on = conditions['contest_start'].strftime('%Y%m%d'), when
+        log.append(rec)
+    valid, invalid, scores = run('pskfest', log, {'contest_name': 'pskfest'}, 'numpy')
+    assert [rec.time_on for rec in valid] == ['0100', '0130']
+    assert [(entry['data'].time_on, entry['errors']) for entry in invalid] == [
+        ('0110', ['is_dupe']), ('0120', ['not_valid_band']), ('0140', ['is_dupe'])]
+
+
+def test_qsos_without_a_dupe_key():
+    # no call: valid if it's the first QSO to pass the other checks, a dupe after that
+    conditions = contests.set_conditions(2024, 'pskfest')
+    log = []
+    for when, band, call in [('0100', 'xx', 'KA3X'), ('0110', '20m', None), ('0120', '20m', 'KA3X'),
+                             ('0130', '20m', None), ('0140', 'xx', None)]:
+        rec = adifparser.QSO()
+        rec.call, rec.band, rec.mode = call, band, 'PSK31'
+        rec.qso_date, rec.time_on = conditions['contest_start'].strftime('%Y%m%d'), when
+        log.append(rec)
+    python = run('pskfest', log, {'contest_name': 'pskfest'}, 'python')
+    numpy = run('pskfest', log, {'contest_name': 'pskfest'}, 'numpy')
+    assert [rec.time_on for rec in numpy[0]] == ['0110', '0120']
+    assert [(entry['data'].time_on, entry['errors']) for entry in numpy[1]] == [
+        ('0100', ['not_valid_band']), ('0130', ['is_dupe']), ('0140', ['not_valid_band', 'is_dupe'])]
+    assert repr(numpy) == repr(python)
+
+
+@pytest.mark.parametrize('contest', ['pskfest', 'vdsprint'])
+def test_multiplier_totals_agree(contest):
+    rng = random.Random(contest)
+    conditions = contests.set_conditions(2024, contest)
+    log = random_log(conditions, 2000, rng)
+    python = run(contest, log, summaries[contest][0], 'python')[2]
+    numpy = run(contest, log, summaries[contest][0], 'numpy')[2]
+    assert repr(numpy['mults']) == repr(python['mults'])
+    assert numpy['total'] == python['total']
+    assert len(python['mults']['dxcc']['data']) > 1 and len(python['mults']['state']) > 1
+
+
+def test_tallies_match_count_dxcc_state():
+    rng = random.Random(1)
+    conditions = contests.set_conditions(2024, 'pskfest')
+    records = [contests.synthesize_fields(rec) for rec in random_log(conditions, 500, rng, 0.1)]
+    # synthesize_fields() finds most of them a DXCC, these go to errors
+    for rec in records[::25]:
+        rec.dxcc = None
+    columns = columnar.load_columns(records)
+    rows = columnar.numpy.array(sorted(rng.sample(range(len(records)), 200)))
+    dxcc, state = contests.MultiplierTally(), contests.MultiplierTally()
+    for i in rows.tolist():
+        contests.count_dxcc_state(records[i], dxcc, state)
+    col_dxcc, col_state = columnar.dxcc_state_tallies(records, rows, columns)
+    for python, numpy in [(dxcc, col_dxcc), (state, col_state)]:
+        assert numpy.data == python.data and python.data
+        # the same QSOs, not just equal ones
+        assert [id(rec) for rec in numpy.errors] == [id(rec) for rec in python.errors]
+        assert {key: id(rec) for key, rec in numpy.first.items()} == {key: id(rec) for key, rec in python.first.items()}
@@ -0,0 +1,105 @@
+import pytest
+import adifparser
+import contests
+
+
+def qso(**fields):
+    rec = adifparser.QSO()
+    for name, value in fields.items():
+        setattr(rec, name, value)
+    return rec
+
+
+@pytest.mark.parametrize('call, dxcc', [
+    ('W1AW', '291'),
+    ('VE3XYZ', '1'),
+    ('JA1ABC', '339'),
+    ('W9SMR/9', '291'),
+    # portable calls go by the prefix they're operating under
+    ('DU1/N6HPX', '375'),
+    ('W1AW/KH6', '110'),
+    ('KH6/W1AW', '110'),
+    # exact calls and longer prefixes win over the plain prefix
+    ('KC4AAA', '13'),
+    ('VK9NA', '189'),
+    ('N0NM/MM', None),
+    ('', None),
+])
+def test_call_dxcc(call, dxcc):
+    assert contests.call_dxcc(call) == dxcc
+
+
+def test_get_dxcc_falls_back_to_the_call():
+    assert contests.get_dxcc(qso(call='JA1ABC')) == '339'
+    assert contests.get_dxcc(qso(call='JA1ABC', qth='somewhere in the woods')) == '339'
+    # what the QSO says about the location comes first
+    assert contests.get_dxcc(qso(call='W1AW', state='HI')) == '110'
+    assert contests.get_dxcc(qso(call='W1AW', qth='Tokyo JAPAN')) == '339'
+    assert contests.get_dxcc(qso()) is None
+
+
+@pytest.mark.parametrize('freq, band', [
+    (14.070, '20m'),
+    (14070, '20m'),
+    (14070000, '20m'),
+    (1.838, '160m'),
+    (5.357, '60m'),
+    (28.120, '10m'),
+    (50.290, '6m'),
+    (50290, '6m'),
+    (144.2, '2m'),
+    (432.1, '70cm'),
+    (14.350, '20m'),
+    (14.351, '??'),
+    (99.0, '??'),
+    (0, '??'),
+])
+def test_get_band_from_freq(freq, band):
+    assert contests.get_band_from_freq(freq) == band
+
+
+def test_band_from_freq_field():
+    assert contests.synthesize_fields(qso(freq='50,290')).band == '6m'
+    assert contests.synthesize_fields(qso(freq='7.035', band='40M')).band == '40M'
+    assert contests.synthesize_fields(qso()).band == '??'
+    assert contests.bands_from_freqs(['14.070', 14070, '3.580', '14.070']) == ['20m', '20m', '80m', '20m']
+
+
+def test_synthesize_log_fills_bands_a_chunk_at_a_time(monkeypatch):
+    calls = []
+
+    def bands_from_freqs(freqs):
+        calls.append(list(freqs))
+        return real(freqs)
+    real = contests.bands_from_freqs
+    monkeypatch.setattr(contests, 'bands_from_freqs', bands_from_freqs)
+    log = [qso(freq='14.070'), qso(freq='3,580', band=''), qso(band='40m', freq='14.070'), qso(freq=''),
+           qso(freq='50.290')]
+    records = list(contests.synthesize_log(iter(log), chunk=3))
+    assert records == log
+    assert [rec.band for rec in records] == ['20m', '80m', '40m', '??', '6m']
+    assert calls == [['14.070', '3,580'], ['50.290']]
+
+
+def test_portable_calls_are_dupes_of_the_plain_call():
+    valid = []
+    dupe_index = set()
+    for call in ['W9SMR', 'W9SMR/9', 'w9smr/p', 'DU1/N6HPX', 'N6HPX', 'N6HPX/DU1']:
+        rec = qso(call=call, band='20m', mode='PSK31')
+        if contests.rec_is_not_dupe(rec, valid, dupe_index):
+            valid.append(rec)
+            dupe_index.add(contests.dupe_key(rec))
+    # N6HPX at home and operating from DU1 are different stations
+    assert [rec.call for rec in valid] == ['W9SMR', 'DU1/N6HPX', 'N6HPX']
+
+
+def test_dupe_check_without_an_index_agrees():
+    valid = [qso(call='W9SMR', band='20m', mode='PSK31'), qso(call='DU1/N6HPX', band='40m', mode='BPSK31')]
+    index = set(contests.dupe_key(rec) for rec in valid)
+    for call, band, mode in [('W9SMR/9', '20m', 'psk31'), ('W9SMR', '40m', 'PSK31'), ('N6HPX/DU1', '40M', 'BPSK31'),
+                             ('N6HPX', '40m', 'BPSK31')]:
+        rec = qso(call=call, band=band, mode=mode)
+        assert contests.rec_is_not_dupe(rec, valid) == contests.rec_is_not_dupe(rec, valid, index)
+    # a QSO missing a dupe field can't be told apart, so it's a dupe once there's a valid QSO
+    assert contests.rec_is_not_dupe(qso(call='K1ABC', mode='PSK31'), valid) is False
+    assert contests.rec_is_not_dupe(qso(call='K1ABC', mode='PSK31'), []) is True
@@ -0,0 +1,80 @@
+import pytest
+import adifparser
+import crosscheck
+
+
+def qso(call, time_on, band='20m', mode='PSK31', qso_date='20240106'):
+    rec = adifparser.QSO()
+    rec.call, rec.time_on, rec.band, rec.mode, rec.qso_date = call, time_on, band, mode, qso_date
+    return rec
+
+
+def statuses(results):
+    return {entrant: [(result['status'], result['match']) for result in log] for entrant, log in results.items()}
+
+
+def test_match_times_pairs_each_qso_once():
+    ours = [(0, 'a'), (100, 'b'), (1000, 'c')]
+    theirs = [(50, 'x'), (60, 'y'), (1400, 'z')]
+    assert crosscheck.match_times(ours, theirs, 300) == [('a', 'x'), ('b', 'y')]
+    assert crosscheck.match_times(ours, theirs, 400) == [('a', 'x'), ('b', 'y'), ('c', 'z')]
+    assert crosscheck.match_times(ours, [], 300) == []
+
+
+def test_match_times_pairs_as_many_as_it_can():
+    # greedy from the earliest: 0 takes 200, so 400 is still there for 500
+    ours = [(0, 'a'), (500, 'b')]
+    theirs = [(200, 'x'), (400, 'y')]
+    assert crosscheck.match_times(ours, theirs, 300) == [('a', 'x'), ('b', 'y')]
+
+
+@pytest.mark.parametrize('a, b, close', [
+    ('K1ABC', 'K1ABD', True),
+    ('K1ABC', 'K1AB', True),
+    ('K1AB', 'K1XAB', True),
+    ('K1ABC', 'K1ABC', False),
+    ('K1ABC', 'K1AXY', False),
+    ('K1ABC', 'K1A', False),
+])
+def test_one_edit(a, b, close):
+    assert crosscheck.one_edit(a, b) is close
+    assert crosscheck.one_edit(b, a) is close
+
+
+def test_crosscheck():
+    logs = {
+        'K1AA': [
+            qso('W2BB', '0100'),          # in W2BB's log two minutes later
+            qso('W2BB', '0300'),          # not in W2BB's log
+            qso('W2BC', '0400'),          # W2BB copied as W2BC
+            qso('N0NM', '0500'),          # no log from N0NM, K1AA is the only one who worked it
+            qso('G4BRA', '0600'),         # no log from G4BRA, W2BB worked it too
+            qso('W2BB', '0700', band='40m'),
+            qso('W2BB/P', '0800', mode='BPSK31'),
+        ],
+        'W2BB': [
+            qso('K1AA', '0102'),
+            qso('K1AA', '0401'),
+            qso('G4BRA', '0610'),
+            qso('K1AA', '0730'),          # 40m QSO in K1AA's log, 20m here, and too far off anyway
+            qso('K1AA/9', '0804', mode='PSK'),
+        ],
+    }
+    assert statuses(crosscheck.crosscheck(logs)) == {
+        'K1AA': [('confirmed', 'W2BB'), ('not_in_log', None), ('busted', 'W2BB'), ('unique', None),
+                 ('no_log', None), ('not_in_log', None), ('confirmed', 'W2BB')],
+        'W2BB': [('confirmed', 'K1AA'), ('not_in_log', None), ('no_log', None), ('not_in_log', None),
+                 ('confirmed', 'K1AA')],
+    }
+
+
+def test_crosscheck_tolerance():
+    logs = {'K1AA': [qso('W2BB', '0100')], 'W2BB': [qso('K1AA', '0108')]}
+    assert statuses(crosscheck.crosscheck(logs, minutes=5))['K1AA'] == [('not_in_log', None)]
+    assert statuses(crosscheck.crosscheck(logs, minutes=10))['K1AA'] == [('confirmed', 'W2BB')]
+
+
+def test_crosscheck_qso_confirms_only_one():
+    # two QSOs in one log, one in the other: only one of them is confirmed
+    logs = {'K1AA': [qso('W2BB', '0100'), qso('W2BB', '0102')], 'W2BB': [qso('K1AA', '0101')]}
+    assert statuses(crosscheck.crosscheck(logs))['K1AA'] == [('confirmed', 'W2BB'), ('not_in_log', None)]
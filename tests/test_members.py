@@ -0,0 +1,62 @@
+import pytest
+import members
+
+member_csv = """nr,call,startdate,enddate,qth
+1,KA3X,20000921,20080824,PA
+2,AG4CZ,20000922,,KY
+3,W1AW,20010101,,CT
+4,VP2MAB,20010102,,MS
+5,KA3X,20100101,,PA
+6,N6HPX,20020202,,CA
+"""
+
+
+@pytest.fixture(autouse=True)
+def member_file(tmp_path, monkeypatch):
+    path = tmp_path / 'members.txt'
+    path.write_text(member_csv)
+    built = members.build_members(str(path))
+    # what load_members() would have set up; the module's own attributes stay as they are
+    for name in members._lazy_names:
+        monkeypatch.setattr(members, name, built[name], raising=False)
+
+
+@pytest.mark.parametrize('call, number', [
+    ('AG4CZ', '2'),
+    ('ag4cz', '2'),
+    ('W1AW/KH6', '3'),
+    ('KH6/W1AW', '3'),
+    ('DU1/N6HPX', '6'),
+    ('N6HPX/P', '6'),
+    # both parts are members; the one listed first in the member file wins
+    ('VP2MAB/W1AW', '3'),
+    ('W1AW/VP2MAB', '3'),
+    ('K1ABC', False),
+    ('K1ABC/KH6', False),
+    # split by callsign.call_parts(), like the dupe check
+    (' W1AW ', '3'),
+    ('N6HPX//P', '6'),
+])
+def test_is_member(call, number):
+    assert members.is_member(call) == number
+
+
+def test_is_member_max_valid():
+    # KA3X held #1 and later #5; the first one listed that counts wins
+    assert members.is_member('KA3X') == '1'
+    assert members.is_member('VP2MAB/W1AW', max_valid=2) is False
+    assert members.is_member('VP2MAB/W1AW', max_valid=4) == '3'
+
+
+@pytest.mark.parametrize('call, qso_date, number', [
+    ('KA3X', '20050101', '1'),
+    ('KA3X', '20090101', False),
+    ('KA3X/P', '20110101', '5'),
+    ('W1AW/KH6', '20240101', '3'),
+    ('W1AW/KH6', '20000101', False),
+    ('VP2MAB/W1AW', '20240101', '3'),
+    ('DU1/N6HPX', '20240101', '6'),
+    ('N6HPX', 'bad date', False),
+])
+def test_is_member_on(call, qso_date, number):
+    assert members.is_member_on(call, qso_date) == number
@@ -0,0 +1,60 @@
+import os
+import socket
+import threading
+import pytest
+import scoring_client
+
+
+@pytest.fixture
+def service(tmp_path):
+    """ a stand-in service: the test says what it sends back once the request is read (None: nothing)"""
+    directory = tmp_path / 'run'
+    os.mkdir(str(directory), 0o700)
+    path = str(directory / 'scoring.sock')
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    replies = []
+    done = threading.Event()
+
+    def serve():
+        conn, address = server.accept()
+        with conn:
+            conn.makefile('rb').readline()
+            if replies[0] is not None:
+                conn.sendall(replies[0])
+            else:
+                done.wait(5)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    yield path, replies, thread
+    done.set()
+    server.close()
+
+
+def ask(service, reply):
+    path, replies, thread = service
+    replies.append(reply)
+    thread.start()
+    return scoring_client.request_scoring('pskfest.py', [], path, timeout=0.5)
+
+
+def test_response(service):
+    assert ask(service, b'{"status": 3, "output": "x\\n"}\n') == {'status': 3, 'output': 'x\n'}
+
+
+@pytest.mark.parametrize('reply', [
+    None,  # never answers
+    b'',  # hangs up
+    b'{"status": 0, "outp',  # hangs up part way
+    b'\xff\xfe\n',
+    b'[0, "x"]\n',
+    b'{"status": "0", "output": "x"}\n',
+])
+def test_anything_but_a_response_is_none(service, reply):
+    assert ask(service, reply) is None
+
+
+def test_no_service(tmp_path):
+    os.mkdir(str(tmp_path / 'run'), 0o700)
+    assert scoring_client.request_scoring('pskfest.py', [], str(tmp_path / 'run' / 'scoring.sock')) is None
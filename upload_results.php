@@ -188,8 +188,10 @@ if (fwrite($handle, $summary_content) === FALSE) {
 // 
 // Build the command string and get the output
 // 
+// scoring_client.py hands the run to scoring_service.py when it is up
+// and runs the contest script itself when it isn't
 $cmd_tail = " 2>&1";
-$cmd_string = "python3 " . $contest_script . " --year " . $year . " --summary " . $summary . " --call " . $callsign . " --adif " . $adiffile . $cmd_tail;
+$cmd_string = "python3 scoring_client.py " . $contest_script . " --year " . $year . " --summary " . $summary . " --call " . $callsign . " --adif " . $adiffile . $cmd_tail;
 //$cmd_string = "python3 " . $contest_script . " --year " . $year . " --summary " . $summary . " --call " . $callsign . " --adif-summary " . $cmd_tail;
 $output=null;
 $retval=null;
@@ -198,7 +200,7 @@ exec($cmd_string, $output, $retval);
 if($debug == 1){
     // instead of just restating commandline, maybe run the command with a debug flag?
     echo "<h3>Command output results</h3>";
-    $debug_cmd_string = "python3 " . $contest_script . " --debug --year " . $year . " --summary " . $summary . " --call " . $callsign . " --adif " . $adiffile . $cmd_tail;
+    $debug_cmd_string = "python3 scoring_client.py " . $contest_script . " --debug --year " . $year . " --summary " . $summary . " --call " . $callsign . " --adif " . $adiffile . $cmd_tail;
     $debug_output=null;
     $debug_retval=null;
     exec($debug_cmd_string, $debug_output, $debug_retval);